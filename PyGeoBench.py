@@ -0,0 +1,598 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+###############################################################################
+# Module:   PyGeoBench.py           Autor: Felipe Almeida                     #
+# Start:    17-Oct-2026             LastUpdate: 17-Oct-2026     Version: 1.0  #
+###############################################################################
+# Harvest and Process Cycles of PyGeoImages Against a Synthetic STAC API, on
+# Generated Geometry Fixtures, at Several (Cities x Collections) Scales.
+#
+#   python PyGeoBench.py run --scales 10x1,200x1,200x134,5571x1,5571x134
+#   python PyGeoBench.py run --scales 100x1 --seed-meta 100000
+#   python PyGeoBench.py serve --port 8765
+#
+# PostgreSQL is Used Only When --pg-dsn Points to a Scratch Database, Without
+# It the Process Phase is Skipped. RabbitMQ is an In-Process Fake Unless
+# --rabbit-url is Given. Nothing is Read From .env Connections.
+###############################################################################
+
+import sys
+import os
+import argparse
+import datetime
+import glob
+import hashlib
+import http.server
+import json
+import multiprocessing
+import resource
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import shapely
+import shapely.geometry
+
+ThisPath = os.path.dirname(os.path.realpath(__file__))+'/'
+
+gStatesFixture = [
+    ('RO',11,'Rondonia','Norte'), ('AC',12,'Acre','Norte'), ('AM',13,'Amazonas','Norte'),
+    ('RR',14,'Roraima','Norte'), ('PA',15,'Para','Norte'), ('AP',16,'Amapa','Norte'),
+    ('TO',17,'Tocantins','Norte'), ('MA',21,'Maranhao','Nordeste'), ('PI',22,'Piaui','Nordeste'),
+    ('CE',23,'Ceara','Nordeste'), ('RN',24,'Rio Grande do Norte','Nordeste'), ('PB',25,'Paraiba','Nordeste'),
+    ('PE',26,'Pernambuco','Nordeste'), ('AL',27,'Alagoas','Nordeste'), ('SE',28,'Sergipe','Nordeste'),
+    ('BA',29,'Bahia','Nordeste'), ('MG',31,'Minas Gerais','Sudeste'), ('ES',32,'Espirito Santo','Sudeste'),
+    ('RJ',33,'Rio de Janeiro','Sudeste'), ('SP',35,'Sao Paulo','Sudeste'), ('PR',41,'Parana','Sul'),
+    ('SC',42,'Santa Catarina','Sul'), ('RS',43,'Rio Grande do Sul','Sul'), ('MS',50,'Mato Grosso do Sul','Centro-Oeste'),
+    ('MT',51,'Mato Grosso','Centro-Oeste'), ('GO',52,'Goias','Centro-Oeste'), ('DF',53,'Distrito Federal','Centro-Oeste')
+]
+
+BenchDDL = """
+CREATE SCHEMA IF NOT EXISTS sat_images;
+CREATE TABLE IF NOT EXISTS sat_images.metafiles_log (
+    log_unique_id           CHAR(32) PRIMARY KEY,
+    execution_id            CHAR(32),
+    execution_dt            TIMESTAMPTZ,
+    collection_id           VARCHAR(50),
+    interest_bbox_id        INTEGER,
+    interest_bbox_name      VARCHAR(100),
+    search_range_start_dt   TIMESTAMPTZ,
+    search_range_end_dt     TIMESTAMPTZ,
+    meta_file_id            CHAR(32),
+    meta_file_dt            TIMESTAMPTZ,
+    meta_file_name          VARCHAR(255)
+);
+CREATE TABLE IF NOT EXISTS sat_images.metafiles_assets (
+    meta_file_name          VARCHAR(255),
+    collection_id           VARCHAR(50),
+    item_id                 VARCHAR(255),
+    asset_name              VARCHAR(100),
+    asset_type              VARCHAR(255),
+    asset_title             VARCHAR(255),
+    href_link               TEXT,
+    PRIMARY KEY (meta_file_name, asset_name)
+);
+CREATE INDEX IF NOT EXISTS metafiles_log_execution_idx ON sat_images.metafiles_log (execution_id, collection_id);
+"""
+
+
+class MockStacHandler(http.server.BaseHTTPRequestHandler):
+    ### Landing Page and POST /search Over a Fixed Tile Grid, Items Generated From (Collection, Tile, Day, Index)
+    ### Settings (Class Attributes): TileDeg, Density (Items per Tile and Day), PageSize, LatencyMs
+    TileDeg = 1.0
+    Density = 1
+    PageSize = 100
+    LatencyMs = 0.0
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def SendJson(self, v_jBody, v_Status=200):
+        Body = json.dumps(v_jBody, separators=(',',':')).encode('UTF-8')
+        self.send_response(v_Status)
+        self.send_header('Content-Type', 'application/geo+json' if (v_jBody.get('type') == 'FeatureCollection') else 'application/json')
+        self.send_header('Content-Length', str(len(Body)))
+        self.end_headers()
+        self.wfile.write(Body)
+
+    def BaseUrl(self):
+        return 'http://'+self.headers.get('Host', '127.0.0.1')
+
+    def do_GET(self):
+        if (self.LatencyMs > 0):
+            time.sleep(self.LatencyMs/1000)
+        BaseUrl = self.BaseUrl()
+        self.SendJson({
+            'type':'Catalog',
+            'id':'pygeobench',
+            'stac_version':'1.0.0',
+            'description':'PyGeoBench Synthetic STAC API',
+            'conformsTo':[
+                'https://api.stacspec.org/v1.0.0/core',
+                'https://api.stacspec.org/v1.0.0/item-search'
+            ],
+            'links':[
+                {'rel':'self','href':BaseUrl,'type':'application/json'},
+                {'rel':'root','href':BaseUrl,'type':'application/json'},
+                {'rel':'search','href':BaseUrl+'/search','type':'application/geo+json','method':'POST'}
+            ]
+        })
+
+    def do_POST(self):
+        if (self.LatencyMs > 0):
+            time.sleep(self.LatencyMs/1000)
+        jBody = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        SearchBBOX = jBody.get('bbox', [-180, -90, 180, 90])
+        dtStart, dtEnd = [datetime.datetime.fromisoformat(dtPart) for dtPart in jBody['datetime'].split('/')]
+        PageSize = int(jBody.get('limit') or self.PageSize)
+        PageOffset = int(jBody.get('token') or 0)
+
+        ### Keys of All Matching Items in a Stable Order, Only the Requested Page is Rendered
+        TileX0, TileX1 = int((SearchBBOX[0]+180)//self.TileDeg), int((SearchBBOX[2]+180)//self.TileDeg)
+        TileY0, TileY1 = int((SearchBBOX[1]+90)//self.TileDeg), int((SearchBBOX[3]+90)//self.TileDeg)
+        dtDays = []
+        dtDay = dtStart.replace(hour=12, minute=0, second=0, microsecond=0)
+        if (dtDay < dtStart):
+            dtDay += datetime.timedelta(days=1)
+        while (dtDay <= dtEnd):
+            dtDays.append(dtDay)
+            dtDay += datetime.timedelta(days=1)
+        ItemKeys = [(CollectionId, TileX, TileY, dtItem, itItem)
+            for CollectionId in jBody.get('collections', [])
+            for dtItem in dtDays
+            for TileX in range(TileX0, TileX1+1)
+            for TileY in range(TileY0, TileY1+1)
+            for itItem in range(self.Density)]
+
+        BaseUrl = self.BaseUrl()
+        jLinks = [{'rel':'root','href':BaseUrl,'type':'application/json'}]
+        if (PageOffset+PageSize < len(ItemKeys)):
+            jLinks.append({'rel':'next','href':BaseUrl+'/search','type':'application/geo+json','method':'POST',
+                'body':dict(jBody, token=str(PageOffset+PageSize)),'merge':False})
+        self.SendJson({
+            'type':'FeatureCollection',
+            'features':[self.Item(BaseUrl, *ItemKey) for ItemKey in ItemKeys[PageOffset:PageOffset+PageSize]],
+            'links':jLinks,
+            'numberMatched':len(ItemKeys),
+            'numberReturned':len(ItemKeys[PageOffset:PageOffset+PageSize])
+        })
+
+    def Item(self, v_BaseUrl, v_CollectionId, v_TileX, v_TileY, v_dtItem, v_itItem):
+        ItemId = v_CollectionId+'_T'+str(v_TileX).zfill(3)+str(v_TileY).zfill(3)+'_'+v_dtItem.strftime('%Y%m%d')+'_'+str(v_itItem)
+        ItemSeed = int(hashlib.md5(ItemId.encode('UTF-8')).hexdigest()[:8], 16)
+        ### Footprints Overlap Their Neighbours Like Real Scenes
+        ItemBBOX = [
+            round(v_TileX*self.TileDeg-180-0.05, 6), round(v_TileY*self.TileDeg-90-0.05, 6),
+            round((v_TileX+1)*self.TileDeg-180+0.05, 6), round((v_TileY+1)*self.TileDeg-90+0.05, 6)
+        ]
+        AssetHref = 'https://pygeobench.example.com/'+v_CollectionId+'/'+ItemId # Not a Blob Storage Host, SignHref Leaves It Unchanged
+        return {
+            'type':'Feature',
+            'stac_version':'1.0.0',
+            'stac_extensions':[],
+            'id':ItemId,
+            'collection':v_CollectionId,
+            'bbox':ItemBBOX,
+            'geometry':shapely.geometry.mapping(shapely.box(*ItemBBOX)),
+            'properties':{
+                'datetime':(v_dtItem+datetime.timedelta(minutes=v_itItem)).astimezone(datetime.UTC).isoformat().replace('+00:00','Z'),
+                'eo:cloud_cover':round((ItemSeed % 10000)/100, 2),
+                'platform':'bench-'+str(ItemSeed % 2)
+            },
+            'links':[{'rel':'collection','href':v_BaseUrl+'/collections/'+v_CollectionId}],
+            'assets':{
+                'visual':{'href':AssetHref+'/visual.tif','type':'image/tiff; application=geotiff; profile=cloud-optimized','title':'True color image'},
+                'B04':{'href':AssetHref+'/B04.tif','type':'image/tiff; application=geotiff; profile=cloud-optimized','title':'Band 4 - Red'},
+                'thumbnail':{'href':AssetHref+'/thumbnail.png','type':'image/png','title':'Thumbnail'},
+                'metadata':{'href':AssetHref+'/metadata.xml','type':'application/xml','title':'Metadata'}
+            }
+        }
+
+
+def ServeMockStac(v_Port, v_TileDeg=1.0, v_Density=1, v_PageSize=100, v_LatencyMs=0.0):
+    MockStacHandler.TileDeg = v_TileDeg
+    MockStacHandler.Density = v_Density
+    MockStacHandler.PageSize = v_PageSize
+    MockStacHandler.LatencyMs = v_LatencyMs
+    MockServer = http.server.ThreadingHTTPServer(('127.0.0.1', v_Port), MockStacHandler)
+    MockServer.daemon_threads = True
+    MockServer.serve_forever()
+
+
+def WriteGeometryFixtures(v_ConfigPath, v_Cities):
+    ### 27 States on a 9x3 Grid Over Brazil, Cities Spread Round-Robin Over Them as Small 16-Sided Polygons
+    jStatesGeo = []
+    jStates = []
+    jCitiesGeo = []
+    jCities = []
+    StateCities = [0]*len(gStatesFixture)
+    for itState, (Sigla, IBGE, Estado, Regiao) in enumerate(gStatesFixture):
+        StateLon, StateLat = -74.0+(itState % 9)*4.4, -34.0+(itState // 9)*13.0
+        jStatesGeo.append({'type':'Feature','id':Sigla,'properties':{'name':Estado},
+            'geometry':shapely.geometry.mapping(shapely.box(StateLon, StateLat, StateLon+4.4, StateLat+13.0))})
+        jStates.append({'Enabled':True,'Estado':Estado,'Regiao':Regiao,'Sigla':Sigla,'IBGE':IBGE})
+
+    for itCity in range(v_Cities):
+        itState = itCity % len(gStatesFixture)
+        itStateCity = StateCities[itState]
+        StateCities[itState] += 1
+        StateLon, StateLat = -74.0+(itState % 9)*4.4, -34.0+(itState // 9)*13.0
+        CityLon = StateLon+0.2+(itStateCity % 10)*0.42
+        CityLat = StateLat+0.2+((itStateCity // 10) % 30)*0.42
+        CityId = gStatesFixture[itState][1]*100000+itStateCity
+        CityShape = shapely.set_precision(shapely.Point(CityLon, CityLat).buffer(0.12, quad_segs=4), 0.000001)
+        jCitiesGeo.append({'type':'Feature','properties':{'id':float(CityId),'name':'Cidade '+str(CityId)},
+            'geometry':shapely.geometry.mapping(CityShape)})
+        jCities.append({
+            'Cod_Municipio_Completo':CityId,
+            'Enabled':True,
+            'Nome_Municipio':'Cidade '+str(CityId),
+            'Nome_UF':gStatesFixture[itState][2],
+            'UF':gStatesFixture[itState][1]
+        })
+
+    for FileName, jContent in (
+        ('Estados_GeoJS.json', {'type':'FeatureCollection','features':jStatesGeo}),
+        ('Estados.json', jStates),
+        ('Municipios_GeoJS.json', {'type':'FeatureCollection','features':jCitiesGeo}),
+        ('Municipios.json', jCities),
+        ('Sources.json', {'Source_01':{'Name':'Planetary Computer','SysName':'PlanetaryComputer','Enabled':True}})):
+        with open(v_ConfigPath+FileName, 'w') as fConfigFile:
+            json.dump(jContent, fConfigFile)
+
+
+def WriteCollectionsFixture(v_MetaPath, v_Collections):
+    with open(v_MetaPath+'PlanetaryComputer_Collections.meta.json', 'w') as fConfigFile:
+        json.dump([{
+            'Enabled':True,
+            '_id':'bench-'+str(itCollection).zfill(3),
+            'Source':'Source_01',
+            'CollectionId':'bench-'+str(itCollection).zfill(3),
+            'Title':'Bench Collection '+str(itCollection),
+            'Type':'Collection',
+            'StacVersion':'1.0.0'
+        } for itCollection in range(v_Collections)], fConfigFile, indent=4)
+
+
+def SeedMetaFiles(v_PyGeoImages, v_Count, v_CollectionIds, v_InterestBBOXArr, v_dtLoopStart, v_Days):
+    ### Meta Tree Left by Earlier Runs: v_Count Items Spread Over the Collections, Days and Cities of the Case
+    ### Written Through the Meta Store, Then Index and Catalog are Dropped so the Harvest Starts From Files Only
+    MetaIndex = v_PyGeoImages.OpenMetaStore(v_PyGeoImages.Harvest['META_STORE'], v_PyGeoImages.MetaPath)
+    for itSeed in range(v_Count):
+        CollectionId = v_CollectionIds[itSeed % len(v_CollectionIds)]
+        dtItem = (v_dtLoopStart + datetime.timedelta(days=(itSeed // len(v_CollectionIds)) % (v_Days+1), hours=10)).astimezone(datetime.UTC)
+        gInterestBBOX = v_InterestBBOXArr[(itSeed // (len(v_CollectionIds)*(v_Days+1))) % len(v_InterestBBOXArr)]
+        jItem = {
+            'type':'Feature',
+            'stac_version':'1.0.0',
+            'id':'seed-'+str(itSeed).zfill(8),
+            'collection':CollectionId,
+            'bbox':list(gInterestBBOX['bbox']),
+            'geometry':None,
+            'properties':{'datetime':dtItem.isoformat(), 'eo:cloud_cover':float(itSeed % 100)},
+            'assets':{},
+            'links':[],
+            '_query':{'collection':CollectionId, 'InterestBBOX_id':gInterestBBOX['id'], 'InterestBBOX_name':gInterestBBOX['name'], 'datetime':''},
+            '_overlap':1.0
+        }
+        jItem['_filename'] = MetaIndex.ItemName(CollectionId, dtItem.strftime("%Y%m%d"), gInterestBBOX['id'], jItem['id'])
+        MetaIndex.Save(CollectionId, dtItem.strftime("%Y%m%d"), jItem)
+    MetaIndex.Close()
+    for StateFileName in glob.glob(v_PyGeoImages.MetaPath+'Items.*.sqlite*'):
+        os.remove(StateFileName)
+
+
+class FakeChannel:
+    ### Stands in for the Transactional pika Channel, Publishes are Counted Only
+    def __init__(self):
+        self.Published = 0
+        self.Committed = 0
+
+    def basic_publish(self, exchange='', routing_key='', body='', properties=None, mandatory=False):
+        self.Published += 1
+
+    def tx_commit(self):
+        self.Committed = self.Published
+
+
+class FakeConnection:
+    def process_data_events(self, time_limit=None):
+        pass
+
+    def close(self):
+        pass
+
+
+def DirStats(v_Path):
+    Files = 0
+    Bytes = 0
+    for root, dirs, files in os.walk(v_Path):
+        for FileName in files:
+            Files += 1
+            Bytes += os.path.getsize(os.path.join(root, FileName))
+    return Files, Bytes
+
+
+def RunCase(v_Args):
+    ### One Harvest (and Process) Cycle in a Fresh Work Dir, Prints a JSON Result Line
+    WorkPath = tempfile.mkdtemp(prefix='pygeobench_')+'/'
+    for SubPath in ('config', 'meta', 'log', 'cache'):
+        os.makedirs(WorkPath+SubPath)
+    WriteGeometryFixtures(WorkPath+'config/', v_Args.cities)
+    WriteCollectionsFixture(WorkPath+'meta/', v_Args.collections)
+
+    ### Settings Come From Here, Not From the Production .env
+    os.environ.update({
+        'Harvest_STAC_URL':v_Args.stac_url,
+        'Harvest_SEARCH_WORKERS':str(v_Args.search_workers),
+        'Harvest_RATE_LIMIT':'0',
+        'Harvest_MAX_BACKOFF':'60',
+        'Harvest_OVERLAP_HOURS':'72',
+        'Harvest_SIMPLIFY_DEG':'0.001',
+        'Harvest_CACHE_MAX_MB':'512',
+        'Harvest_WINDOW_DEG':str(v_Args.window_deg),
+        'Harvest_SLICE_DAYS':'0',
+        'Harvest_MIN_OVERLAP':'0',
+        'Harvest_META_STORE':v_Args.meta_store,
+        'Harvest_CACHE_TTL':str(v_Args.cache_ttl),
+        'Harvest_PROCESSES':str(v_Args.processes),
+        'Harvest_PAGE_SIZE':str(v_Args.stac_limit),
+        'Harvest_PAGE_BUFFER':str(v_Args.page_buffer),
+        'Harvest_STATES':'',
+        'Harvest_METRICS_PROM_FILE':'',
+        'Msg_Rabiit_QUEUE':'pygeobench',
+        'Msg_Rabiit_BATCH':'500'
+    })
+    sys.path.insert(0, ThisPath)
+    import PyGeoImages
+
+    PyGeoImages.ConfigPath = WorkPath+'config/'
+    PyGeoImages.MetaPath = WorkPath+'meta/'
+    PyGeoImages.LogPath = WorkPath+'log/'
+    PyGeoImages.CachePath = WorkPath+'cache/'
+    PyGeoImages.Metrics = PyGeoImages.PipelineMetrics()
+    PyGeoImages.ExecutionDt = datetime.datetime.now(datetime.UTC).astimezone().isoformat()
+    PyGeoImages.ExecutionId = str(hashlib.md5((PyGeoImages.ExecutionDt).encode('UTF-8')).hexdigest())
+
+    dtSetup = time.perf_counter()
+    PyGeoImages.EnvironmentSetup(False)
+    dtSetup = time.perf_counter()-dtSetup
+
+    dtLoopEnd = datetime.datetime(2026, 1, 31, 23, 59, 59)
+    dtLoopStart = dtLoopEnd.replace(hour=0, minute=0, second=0) - datetime.timedelta(days=v_Args.days)
+
+    ### Existing Meta Files: the Index and Catalog are Rebuilt From Them, Then Every Duplicate Check Runs Against Them
+    dtSeed = None
+    dtIndexBuild = None
+    dtCatalogBuild = None
+    if (v_Args.seed_meta > 0):
+        dtSeed = time.perf_counter()
+        SeedMetaFiles(PyGeoImages, v_Args.seed_meta, [collection['CollectionId'] for collection in PyGeoImages.EnabledCollections('Source_01')],
+            PyGeoImages.gCitiesInterestBBOX, dtLoopStart, v_Args.days)
+        dtSeed = time.perf_counter()-dtSeed
+        dtIndexBuild = time.perf_counter()
+        MetaIndex = PyGeoImages.OpenMetaStore(PyGeoImages.Harvest['META_STORE'], PyGeoImages.MetaPath)
+        dtIndexBuild = time.perf_counter()-dtIndexBuild
+        dtCatalogBuild = time.perf_counter()
+        PyGeoImages.OpenItemCatalog(PyGeoImages.MetaPath, MetaIndex).Close()
+        dtCatalogBuild = time.perf_counter()-dtCatalogBuild
+        MetaIndex.Close()
+
+    if v_Args.tracemalloc:
+        tracemalloc.start()
+    dtHarvest = time.perf_counter()
+    bHarvested = PyGeoImages.HarvestPlanetaryComputer('Source_01', dtLoopStart, dtLoopEnd, False)
+    dtHarvest = time.perf_counter()-dtHarvest
+    HarvestHeapPeak = None
+    if v_Args.tracemalloc:
+        ### Python Heap of This Process Only, Sharded Workers are Not Traced
+        HarvestHeapPeak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    HarvestFiles = {SubPath:DirStats(WorkPath+SubPath) for SubPath in ('meta', 'log', 'cache')}
+
+    ### One City, the Whole Range, Under 30% Cloud, the Query Downstream Consumers Make
+    Catalog = PyGeoImages.OpenItemCatalog(PyGeoImages.MetaPath)
+    dtCatalog = time.perf_counter()
+    CatalogItems = Catalog.Search(v_InterestBBOX=PyGeoImages.gCitiesInterestBBOX[0]['id'],
+        v_dtStart=dtLoopStart.astimezone(), v_dtEnd=dtLoopEnd.astimezone(), v_MaxCloudCover=30)
+    dtCatalog = time.perf_counter()-dtCatalog
+    Catalog.Close()
+
+    dtProcess = None
+    Published = None
+    if (len(v_Args.pg_dsn) > 0):
+        import psycopg2
+        PyGeoImages.PgSQL_CONN = psycopg2.connect(v_Args.pg_dsn)
+        PyGeoImages.PgSQL_CURS = PyGeoImages.PgSQL_CONN.cursor()
+        PyGeoImages.PgSQL_CURS.execute(BenchDDL)
+        ### log_unique_id Does Not Depend on the Execution, Rows of Earlier Bench Runs Would Turn Inserts Into Skips
+        PyGeoImages.PgSQL_CURS.execute("DELETE FROM sat_images.metafiles_log WHERE collection_id LIKE 'bench-%';")
+        PyGeoImages.PgSQL_CURS.execute("DELETE FROM sat_images.metafiles_assets WHERE collection_id LIKE 'bench-%';")
+        PyGeoImages.PgSQL_CONN.commit()
+        if (len(v_Args.rabbit_url) > 0):
+            import pika
+            PyGeoImages.Msg_Rabiit = pika.BlockingConnection(pika.URLParameters(v_Args.rabbit_url))
+            PyGeoImages.MsgChannelPublish = PyGeoImages.OpenPublishChannel(PyGeoImages.Msg_Rabiit)
+        else:
+            PyGeoImages.Msg_Rabiit = FakeConnection()
+            PyGeoImages.MsgChannelPublish = FakeChannel()
+        dtProcess = time.perf_counter()
+        PyGeoImages.ProcessPlanetaryComputer('Source_01')
+        dtProcess = time.perf_counter()-dtProcess
+        Published = PyGeoImages.Metrics.Report()['Counters'].get('assets_published', {}).get('Total', 0)
+        PyGeoImages.Msg_Rabiit.close()
+        PyGeoImages.PgSQL_CURS.close()
+        PyGeoImages.PgSQL_CONN.close()
+    if (PyGeoImages.StacCatalog is not None):
+        PyGeoImages.StacCatalog._stac_io.session.close()
+    if (PyGeoImages.StacCache is not None):
+        PyGeoImages.StacCache.Close()
+
+    jReport = PyGeoImages.Metrics.Report()
+    ItemsSeen = sum(jReport['Counters'].get(Name, {}).get('Total', 0) for Name in ('items_new', 'items_duplicate'))
+    jResult = {
+        'Cities':v_Args.cities,
+        'Collections':v_Args.collections,
+        'Processes':v_Args.processes,
+        'MetaStore':v_Args.meta_store,
+        'Days':v_Args.days,
+        'SeedMetaFiles':v_Args.seed_meta,
+        'SeedSec':round(dtSeed, 3) if (dtSeed is not None) else None,
+        'IndexBuildSec':round(dtIndexBuild, 3) if (dtIndexBuild is not None) else None,
+        'CatalogBuildSec':round(dtCatalogBuild, 3) if (dtCatalogBuild is not None) else None,
+        'InterestAreas':len(PyGeoImages.gCitiesInterestBBOX),
+        'Harvested':bHarvested,
+        'SetupSec':round(dtSetup, 3),
+        'HarvestSec':round(dtHarvest, 3),
+        'Searches':jReport['Stages'].get('stac_search', {}).get('Count', 0),
+        'SearchesPerSec':round(jReport['Stages'].get('stac_search', {}).get('Count', 0)/dtHarvest, 1) if (dtHarvest > 0) else 0,
+        'StacItems':jReport['Counters'].get('stac_items', {}).get('Total', 0),
+        'LogRows':ItemsSeen,
+        'LogRowsPerSec':round(ItemsSeen/dtHarvest, 1) if (dtHarvest > 0) else 0,
+        'NewItems':jReport['Counters'].get('items_new', {}).get('Total', 0),
+        'CatalogQueryMs':round(dtCatalog*1000, 2),
+        'CatalogQueryItems':len(CatalogItems),
+        'ProcessSec':round(dtProcess, 3) if (dtProcess is not None) else None,
+        'Published':Published,
+        'PeakRssMiB':round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024, 1),
+        'PeakRssWorkersMiB':round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss/1024, 1),
+        'HarvestHeapPeakMiB':round(HarvestHeapPeak/1048576, 1) if (HarvestHeapPeak is not None) else None,
+        'MetaFiles':HarvestFiles['meta'][0],
+        'MetaBytes':HarvestFiles['meta'][1],
+        'LogFiles':HarvestFiles['log'][0],
+        'LogBytes':HarvestFiles['log'][1],
+        'CacheBytes':HarvestFiles['cache'][1],
+        'Stages':{Stage:{Key:jStage[Key] for Key in ('Count','TotalSec','P50Sec','P99Sec')} for Stage, jStage in jReport['Stages'].items()}
+    }
+    if (not v_Args.keep):
+        shutil.rmtree(WorkPath, ignore_errors=True)
+    else:
+        jResult['WorkPath'] = WorkPath
+    print('PYGEOBENCH '+json.dumps(jResult))
+
+
+def RunBench(v_Args):
+    ### Each Scale Runs in Its Own Interpreter so Peak RSS is Not Carried Over, the Mock Runs in Another Process
+    MockProcess = None
+    StacUrl = v_Args.stac_url
+    if (len(StacUrl) == 0):
+        MockPort = v_Args.port
+        if (MockPort == 0):
+            with socket.socket() as FreeSocket:
+                FreeSocket.bind(('127.0.0.1', 0))
+                MockPort = FreeSocket.getsockname()[1]
+        MockProcess = multiprocessing.get_context('spawn').Process(target=ServeMockStac,
+            args=(MockPort, v_Args.tile_deg, v_Args.density, v_Args.page_size, v_Args.latency_ms), daemon=True)
+        MockProcess.start()
+        StacUrl = 'http://127.0.0.1:'+str(MockPort)
+        for itWait in range(50):
+            try:
+                socket.create_connection(('127.0.0.1', MockPort), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+
+    jResults = []
+    try:
+        for Scale in v_Args.scales.split(','):
+            Cities, Collections = [int(ScalePart) for ScalePart in Scale.lower().split('x')]
+            CaseCmd = [sys.executable, os.path.realpath(__file__), 'case',
+                '--cities', str(Cities), '--collections', str(Collections), '--stac-url', StacUrl,
+                '--days', str(v_Args.days), '--processes', str(v_Args.processes), '--search-workers', str(v_Args.search_workers),
+                '--window-deg', str(v_Args.window_deg), '--meta-store', v_Args.meta_store, '--cache-ttl', str(v_Args.cache_ttl),
+                '--stac-limit', str(v_Args.stac_limit), '--page-buffer', str(v_Args.page_buffer), '--seed-meta', str(v_Args.seed_meta),
+                '--pg-dsn', v_Args.pg_dsn, '--rabbit-url', v_Args.rabbit_url] + (['--keep'] if v_Args.keep else []) + \
+                (['--tracemalloc'] if v_Args.tracemalloc else [])
+            print(f"[INFO] Bench {Cities} cidades x {Collections} colecoes")
+            CaseRun = subprocess.run(CaseCmd, capture_output=True, text=True)
+            jResult = None
+            for OutputLine in CaseRun.stdout.splitlines():
+                if OutputLine.startswith('PYGEOBENCH '):
+                    jResult = json.loads(OutputLine[len('PYGEOBENCH '):])
+            if (jResult is None):
+                print(f"[ERRO] Bench {Scale} falhou:\n{CaseRun.stdout[-2000:]}{CaseRun.stderr[-2000:]}")
+                continue
+            jResults.append(jResult)
+            print(f"[INFO]   harvest {jResult['HarvestSec']}s, {jResult['Searches']} buscas ({jResult['SearchesPerSec']}/s), "
+                  f"{jResult['LogRows']} registros ({jResult['LogRowsPerSec']}/s), pico {jResult['PeakRssMiB']} MiB{' (heap '+str(jResult['HarvestHeapPeakMiB'])+' MiB)' if (jResult['HarvestHeapPeakMiB'] is not None) else ''}, "
+                  f"{jResult['MetaFiles']} arquivos meta, process {str(jResult['ProcessSec'])+'s' if (jResult['ProcessSec'] is not None) else '-'}")
+            if (jResult['SeedMetaFiles'] > 0):
+                jDedup = jResult['Stages'].get('dedup_lookup', {})
+                print(f"[INFO]   {jResult['SeedMetaFiles']} arquivos meta existentes: indice {jResult['IndexBuildSec']}s, catalogo {jResult['CatalogBuildSec']}s, "
+                      f"dedup {jDedup.get('Count', 0)} consultas em {jDedup.get('TotalSec', 0)}s (p50 {jDedup.get('P50Sec')}s, p99 {jDedup.get('P99Sec')}s)")
+    finally:
+        if (MockProcess is not None):
+            MockProcess.terminate()
+            MockProcess.join()
+
+    jBench = {
+        'StartDt':datetime.datetime.now(datetime.UTC).astimezone().isoformat(),
+        'Settings':{Key:Val for Key, Val in vars(v_Args).items() if Key not in ('pg_dsn', 'rabbit_url')},
+        'PostgreSQL':len(v_Args.pg_dsn) > 0,
+        'RabbitMQ':'broker' if (len(v_Args.rabbit_url) > 0) else 'fake',
+        'Results':jResults
+    }
+    OutFileName = v_Args.out or (ThisPath+'log/Bench_'+datetime.datetime.now().strftime('%Y%m%d%H%M%S')+'.json')
+    os.makedirs(os.path.dirname(os.path.realpath(OutFileName)), exist_ok=True)
+    with open(OutFileName, 'w') as fBenchFile:
+        fBenchFile.write(json.dumps(jBench, indent=4))
+    print(f"[INFO] Resultados: {os.path.realpath(OutFileName)}")
+
+
+def main():
+    ArgParser = argparse.ArgumentParser(description='PyGeoImages Benchmark')
+    SubParsers = ArgParser.add_subparsers(dest='command', required=True)
+
+    def AddCaseArgs(v_Parser):
+        v_Parser.add_argument('--days', type=int, default=7, help='Search Range Ending 2026-01-31')
+        v_Parser.add_argument('--processes', type=int, default=1, help='Harvest_PROCESSES, >1 Uses the Sharded Harvest')
+        v_Parser.add_argument('--search-workers', type=int, default=8)
+        v_Parser.add_argument('--window-deg', type=float, default=1.0)
+        v_Parser.add_argument('--meta-store', default='files', choices=['files', 'segments'])
+        v_Parser.add_argument('--cache-ttl', type=float, default=0, help='STAC Response Cache TTL (0 = Off)')
+        v_Parser.add_argument('--stac-limit', type=int, default=100, help='Harvest_PAGE_SIZE, Items per Search Page')
+        v_Parser.add_argument('--page-buffer', type=int, default=2, help='Harvest_PAGE_BUFFER, Pages Queued per Search')
+        v_Parser.add_argument('--tracemalloc', action='store_true', help='Report the Python Heap Peak of the Harvest')
+        v_Parser.add_argument('--seed-meta', type=int, default=0, help='Meta Files Written Before the Harvest, e.g. 100000')
+        v_Parser.add_argument('--pg-dsn', default=os.getenv('Bench_PG_DSN', ''), help='Scratch PostgreSQL, Enables the Process Phase')
+        v_Parser.add_argument('--rabbit-url', default=os.getenv('Bench_RABBIT_URL', ''), help='amqp:// URL, Default is an In-Process Fake')
+        v_Parser.add_argument('--keep', action='store_true', help='Keep the Work Dirs')
+
+    RunParser = SubParsers.add_parser('run', help='Run All Scales')
+    RunParser.add_argument('--scales', default='10x1,200x1,200x134,5571x1,5571x134', help='CITIESxCOLLECTIONS, Comma Separated')
+    RunParser.add_argument('--stac-url', default='', help='Existing STAC API, Default Starts the Mock')
+    RunParser.add_argument('--port', type=int, default=0, help='Mock Port (0 = Any Free Port)')
+    RunParser.add_argument('--tile-deg', type=float, default=1.0)
+    RunParser.add_argument('--density', type=int, default=1, help='Mock Items per Tile and Day')
+    RunParser.add_argument('--page-size', type=int, default=100)
+    RunParser.add_argument('--latency-ms', type=float, default=0)
+    RunParser.add_argument('--out', default='')
+    AddCaseArgs(RunParser)
+
+    CaseParser = SubParsers.add_parser('case', help='One Scale (Used by run)')
+    CaseParser.add_argument('--cities', type=int, required=True)
+    CaseParser.add_argument('--collections', type=int, required=True)
+    CaseParser.add_argument('--stac-url', required=True)
+    AddCaseArgs(CaseParser)
+
+    ServeParser = SubParsers.add_parser('serve', help='Mock STAC API Only')
+    ServeParser.add_argument('--port', type=int, default=8765)
+    ServeParser.add_argument('--tile-deg', type=float, default=1.0)
+    ServeParser.add_argument('--density', type=int, default=1)
+    ServeParser.add_argument('--page-size', type=int, default=100)
+    ServeParser.add_argument('--latency-ms', type=float, default=0)
+
+    Args = ArgParser.parse_args()
+    if (Args.command == 'run'):
+        RunBench(Args)
+    elif (Args.command == 'case'):
+        RunCase(Args)
+    else:
+        ServeMockStac(Args.port, Args.tile_deg, Args.density, Args.page_size, Args.latency_ms)
+
+
+if __name__ == "__main__":
+    main()
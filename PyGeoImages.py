@@ -9,15 +9,35 @@ import sys
 import os
 import datetime
 import json
+import csv
+import io
+import zlib
+import struct
 import pystac_client
+import pystac_client.exceptions
 import planetary_computer
-import geojson
-import turfpy.measurement
+import numpy
+import shapely
+import shapely.geometry
 import hashlib
+import math
 import pika
 import requests
 import dotenv
 import psycopg2
+import threading
+import time
+import collections
+import bisect
+import heapq
+import sqlite3
+import queue
+import glob
+import multiprocessing
+import concurrent.futures
+import email.utils
+import urllib.parse
+import argparse
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
@@ -25,45 +45,270 @@ ThisPath    = os.path.dirname(__file__)+'/'
 ConfigPath  = ThisPath+'config/'
 MetaPath    = ThisPath+'meta/'
 LogPath     = ThisPath+'log/'
+CachePath   = ThisPath+'cache/'
 FieldDelim  = ','
 
 if not os.path.exists(MetaPath): os.makedirs(MetaPath)
 if not os.path.exists(LogPath): os.makedirs(LogPath)
+if not os.path.exists(CachePath): os.makedirs(CachePath)
 
 # MgOBJ_CONN = None
 PgSQL_CONN = None
 PgSQL_CURS = None
 Msg_Rabiit = None
 MsgChannelPublish = None
+MsgReturned = []
 RabiitMQ = None
+Harvest = None
+StacCatalog = None
+StacCache = None
+Metrics = None
 
 ExecutionId = ''
 ExecutionDt = ''
 jSources = {}
+LogFieldNames = [
+    'LogUniqueId',
+    'ExecutionId',
+    'ExecutionDt',
+    'CollectionId',
+    'InterestBBOXId',
+    'InterestBBOXName',
+    'SearchRangeStartDt',
+    'SearchRangeEndDt',
+    'MetaFileUniqueId',
+    'MetaFileDt',
+    'MetaFileName'
+]
+AssetFieldNames = [
+    'MetaFileName',
+    'CollectionId',
+    'ItemId',
+    'AssetName',
+    'AssetType',
+    'AssetTitle',
+    'HrefLink'
+]
 gStatesInterestBBOX = []
 gCitiesInterestBBOX = []
 
 
-def DictArrayToCsv(v_jArray, v_FieldDelim=','):
-    CsvHeader = v_jArray[0].keys()
-    CsvHeader = [Field for Field in CsvHeader if Field[0] != '_']
-    CsvHeaderStr = v_FieldDelim.join(CsvHeader)+'\n'
-
-    CsvBody = ''
-    for jItem in v_jArray:
-        CsvLine = ''
-        for Field in CsvHeader:
-            if Field in jItem.keys():
-                CsvLine += str(jItem[Field]) + v_FieldDelim
-        CsvLine = CsvLine[:-1]
-        CsvLine += '\n'
-        CsvBody += CsvLine
-
-    return CsvHeaderStr+CsvBody
-
-
-def EnvironmentSetup():
-    global PgSQL_CONN, PgSQL_CURS, Msg_Rabiit, MsgChannelPublish, RabiitMQ, ConfigPath, jSources, gStatesInterestBBOX, gCitiesInterestBBOX
+def TruncateToLastLine(v_FileName):
+    ### Cuts a Row Left Half-Written by a Killed Run, so a Resumed Run Does Not Append Onto It
+    with open(v_FileName, 'rb+') as fTornFile:
+        FileEnd = fTornFile.seek(0, os.SEEK_END)
+        ScanEnd = FileEnd
+        while (ScanEnd > 0):
+            ScanStart = max(0, ScanEnd-65536)
+            fTornFile.seek(ScanStart)
+            LineEnd = fTornFile.read(ScanEnd-ScanStart).rfind(b'\n')
+            if (LineEnd >= 0):
+                ScanEnd = ScanStart+LineEnd+1
+                break
+            ScanEnd = ScanStart
+        if (ScanEnd < FileEnd):
+            fTornFile.truncate(ScanEnd)
+            print(f"[INFO] {v_FileName}: linha incompleta de {FileEnd-ScanEnd} bytes removida")
+
+
+class CsvLogSink:
+    ### Appends Log Rows as They are Produced, a Crash Leaves Every Flushed Batch on Disk
+    def __init__(self, v_LogFileName, v_FieldNames, v_FieldDelim=','):
+        FieldNames = [Field for Field in v_FieldNames if Field[0] != '_']
+        if os.path.isfile(v_LogFileName):
+            TruncateToLastLine(v_LogFileName)
+        bNewFile = (not os.path.isfile(v_LogFileName)) or (os.path.getsize(v_LogFileName) == 0)
+        self.fCsvLogFile = open(v_LogFileName, 'a', newline='')
+        self.CsvWriter = csv.DictWriter(self.fCsvLogFile, fieldnames=FieldNames, delimiter=v_FieldDelim, lineterminator='\n', extrasaction='ignore')
+        if (bNewFile):
+            self.CsvWriter.writeheader()
+            self.Flush()
+
+    def Write(self, v_jLogData):
+        self.CsvWriter.writerow(v_jLogData)
+
+    def Flush(self):
+        self.fCsvLogFile.flush()
+
+    def Close(self):
+        self.fCsvLogFile.close()
+
+
+class StageTimer:
+    def __init__(self, v_Metrics, v_Stage, v_Label='', v_Detail=None):
+        self.Metrics = v_Metrics
+        self.Stage = v_Stage
+        self.Label = v_Label
+        self.Detail = v_Detail
+
+    def __enter__(self):
+        self.dtStart = time.perf_counter()
+        return self
+
+    def __exit__(self, v_ExcType, v_ExcValue, v_Traceback):
+        self.Metrics.Observe(self.Stage, time.perf_counter()-self.dtStart, self.Label, self.Detail)
+        return False
+
+
+class PipelineMetrics:
+    ### Per-Stage Latency Histograms (Fixed Buckets, Seconds) and Counters, Labeled by Collection, Cheap Enough to Stay On
+    Buckets = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+    SlowestKeep = 20
+
+    def __init__(self):
+        self.Lock = threading.Lock()
+        self.dtStart = time.time()
+        self.Reset()
+
+    def Reset(self):
+        with self.Lock:
+            self.Histograms = {} # (Stage, Label) -> [Bucket Counts (+Inf Last), Sum, Count, Max]
+            self.Counters = {} # (Name, Label) -> Value
+            self.Slowest = [] # Min-Heap of (Seconds, Stage, Label, Detail)
+            self.Details = {} # (Stage, Detail) -> [Sum, Count, Max], e.g. stac_search per Search Window Over All Collections
+
+    def Timer(self, v_Stage, v_Label='', v_Detail=None):
+        return StageTimer(self, v_Stage, v_Label, v_Detail)
+
+    def Observe(self, v_Stage, v_Seconds, v_Label='', v_Detail=None):
+        BucketIdx = bisect.bisect_left(self.Buckets, v_Seconds)
+        with self.Lock:
+            Histogram = self.Histograms.get((v_Stage, v_Label))
+            if (Histogram is None):
+                Histogram = self.Histograms[(v_Stage, v_Label)] = [[0]*(len(self.Buckets)+1), 0.0, 0, 0.0]
+            Histogram[0][BucketIdx] += 1
+            Histogram[1] += v_Seconds
+            Histogram[2] += 1
+            Histogram[3] = max(Histogram[3], v_Seconds)
+            if (v_Detail is not None):
+                Detail = self.Details.get((v_Stage, v_Detail))
+                if (Detail is None):
+                    Detail = self.Details[(v_Stage, v_Detail)] = [0.0, 0, 0.0]
+                Detail[0] += v_Seconds
+                Detail[1] += 1
+                Detail[2] = max(Detail[2], v_Seconds)
+                if (len(self.Slowest) < self.SlowestKeep):
+                    heapq.heappush(self.Slowest, (v_Seconds, v_Stage, v_Label, v_Detail))
+                elif (v_Seconds > self.Slowest[0][0]):
+                    heapq.heapreplace(self.Slowest, (v_Seconds, v_Stage, v_Label, v_Detail))
+
+    def Count(self, v_Name, v_Value=1, v_Label=''):
+        with self.Lock:
+            self.Counters[(v_Name, v_Label)] = self.Counters.get((v_Name, v_Label), 0) + v_Value
+
+    def Snapshot(self, v_bReset=False):
+        ### Plain Lists, Picklable, Returned by the Harvest Workers and Merged by the Coordinator
+        with self.Lock:
+            jSnapshot = {
+                'Histograms':[[Stage, Label, list(Histogram[0]), Histogram[1], Histogram[2], Histogram[3]] for (Stage, Label), Histogram in self.Histograms.items()],
+                'Counters':[[Name, Label, Value] for (Name, Label), Value in self.Counters.items()],
+                'Slowest':[list(SlowEntry) for SlowEntry in self.Slowest],
+                'Details':[[Stage, Detail]+list(DetailTotal) for (Stage, Detail), DetailTotal in self.Details.items()]
+            }
+        if (v_bReset):
+            self.Reset()
+        return jSnapshot
+
+    def Merge(self, v_jSnapshot):
+        with self.Lock:
+            for Stage, Label, BucketCounts, SumSeconds, Count, MaxSeconds in v_jSnapshot['Histograms']:
+                Histogram = self.Histograms.get((Stage, Label))
+                if (Histogram is None):
+                    Histogram = self.Histograms[(Stage, Label)] = [[0]*(len(self.Buckets)+1), 0.0, 0, 0.0]
+                Histogram[0] = [BucketCount+MergeCount for BucketCount, MergeCount in zip(Histogram[0], BucketCounts)]
+                Histogram[1] += SumSeconds
+                Histogram[2] += Count
+                Histogram[3] = max(Histogram[3], MaxSeconds)
+            for Name, Label, Value in v_jSnapshot['Counters']:
+                self.Counters[(Name, Label)] = self.Counters.get((Name, Label), 0) + Value
+            self.Slowest = heapq.nlargest(self.SlowestKeep, self.Slowest+[tuple(SlowEntry) for SlowEntry in v_jSnapshot['Slowest']])
+            heapq.heapify(self.Slowest)
+            for Stage, Detail, SumSeconds, Count, MaxSeconds in v_jSnapshot['Details']:
+                DetailTotal = self.Details.setdefault((Stage, Detail), [0.0, 0, 0.0])
+                DetailTotal[0] += SumSeconds
+                DetailTotal[1] += Count
+                DetailTotal[2] = max(DetailTotal[2], MaxSeconds)
+
+    def Summary(self, v_BucketCounts, v_SumSeconds, v_Count, v_MaxSeconds):
+        ### Quantiles are the Upper Bound of the Bucket Holding Them, Never Above the Observed Max
+        def Quantile(v_Quantile):
+            Cumulative = 0
+            for BucketIdx, BucketCount in enumerate(v_BucketCounts):
+                Cumulative += BucketCount
+                if (Cumulative >= v_Quantile*v_Count):
+                    return min(self.Buckets[BucketIdx], v_MaxSeconds) if (BucketIdx < len(self.Buckets)) else v_MaxSeconds
+            return v_MaxSeconds
+        return {
+            'Count':v_Count,
+            'TotalSec':round(v_SumSeconds, 6),
+            'MeanSec':round(v_SumSeconds/v_Count, 6) if (v_Count > 0) else 0,
+            'P50Sec':Quantile(0.50),
+            'P90Sec':Quantile(0.90),
+            'P99Sec':Quantile(0.99),
+            'MaxSec':round(v_MaxSeconds, 6)
+        }
+
+    def Report(self):
+        jSnapshot = self.Snapshot()
+        jStages = {}
+        StageTotals = {}
+        for Stage, Label, BucketCounts, SumSeconds, Count, MaxSeconds in sorted(jSnapshot['Histograms'], key=lambda Entry: (Entry[0], str(Entry[1]))):
+            jStages.setdefault(Stage, {'ByLabel':{}})['ByLabel'][str(Label)] = self.Summary(BucketCounts, SumSeconds, Count, MaxSeconds)
+            StageTotal = StageTotals.setdefault(Stage, [[0]*(len(self.Buckets)+1), 0.0, 0, 0.0])
+            StageTotal[0] = [BucketCount+LabelCount for BucketCount, LabelCount in zip(StageTotal[0], BucketCounts)]
+            StageTotal[1] += SumSeconds
+            StageTotal[2] += Count
+            StageTotal[3] = max(StageTotal[3], MaxSeconds)
+        for Stage, StageTotal in StageTotals.items():
+            jStages[Stage].update(self.Summary(*StageTotal))
+        ### Every Detail (Search Window) of the Stage, Slowest Mean First, to Find the Slow Areas
+        for Stage, Detail, SumSeconds, Count, MaxSeconds in sorted(jSnapshot['Details'], key=lambda Entry: (Entry[0], -Entry[2]/Entry[3], str(Entry[1]))):
+            jStages.setdefault(Stage, {'ByLabel':{}}).setdefault('ByDetail', {})[str(Detail)] = {
+                'Count':Count,
+                'TotalSec':round(SumSeconds, 6),
+                'MeanSec':round(SumSeconds/Count, 6),
+                'MaxSec':round(MaxSeconds, 6)
+            }
+        jCounters = {}
+        for Name, Label, Value in sorted(jSnapshot['Counters'], key=lambda Entry: (Entry[0], str(Entry[1]))):
+            jCounter = jCounters.setdefault(Name, {'Total':0,'ByLabel':{}})
+            jCounter['Total'] += Value
+            jCounter['ByLabel'][str(Label)] = Value
+        return {
+            'StartDt':datetime.datetime.fromtimestamp(self.dtStart, datetime.UTC).astimezone().isoformat(),
+            'ElapsedSec':round(time.time()-self.dtStart, 3),
+            'Stages':jStages,
+            'Counters':jCounters,
+            'Slowest':[{'Stage':Stage,'Label':Label,'Detail':Detail,'Seconds':round(Seconds, 6)} for Seconds, Stage, Label, Detail in sorted(jSnapshot['Slowest'], reverse=True)]
+        }
+
+    def WritePrometheus(self, v_PromFileName):
+        ### node_exporter Textfile Collector Format, Replaced Atomically so a Scrape Never Reads a Partial File
+        def PromLabel(v_Value):
+            return str(v_Value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        jSnapshot = self.Snapshot()
+        PromLines = ['# HELP pygeoimages_stage_seconds Duration of a pipeline stage.', '# TYPE pygeoimages_stage_seconds histogram']
+        for Stage, Label, BucketCounts, SumSeconds, Count, MaxSeconds in sorted(jSnapshot['Histograms'], key=lambda Entry: (Entry[0], str(Entry[1]))):
+            PromLabels = 'stage="'+PromLabel(Stage)+'",label="'+PromLabel(Label)+'"'
+            Cumulative = 0
+            for BucketIdx, BucketCount in enumerate(BucketCounts):
+                Cumulative += BucketCount
+                PromLines.append('pygeoimages_stage_seconds_bucket{'+PromLabels+',le="'+(repr(self.Buckets[BucketIdx]) if (BucketIdx < len(self.Buckets)) else '+Inf')+'"} '+str(Cumulative))
+            PromLines.append('pygeoimages_stage_seconds_sum{'+PromLabels+'} '+repr(SumSeconds))
+            PromLines.append('pygeoimages_stage_seconds_count{'+PromLabels+'} '+str(Count))
+        PromLines += ['# HELP pygeoimages_events_total Pipeline events.', '# TYPE pygeoimages_events_total counter']
+        for Name, Label, Value in sorted(jSnapshot['Counters'], key=lambda Entry: (Entry[0], str(Entry[1]))):
+            PromLines.append('pygeoimages_events_total{name="'+PromLabel(Name)+'",label="'+PromLabel(Label)+'"} '+str(Value))
+        PromLines += ['# HELP pygeoimages_run_seconds Elapsed time of the run.', '# TYPE pygeoimages_run_seconds gauge']
+        PromLines.append('pygeoimages_run_seconds '+repr(round(time.time()-self.dtStart, 3)))
+        with open(v_PromFileName+'.tmp', 'w') as fPromFile:
+            fPromFile.write('\n'.join(PromLines)+'\n')
+        os.replace(v_PromFileName+'.tmp', v_PromFileName)
+
+
+def EnvironmentSetup(v_bConnect=True):
+    ### v_bConnect=False Loads Settings and Interest Areas Only, Without PostgreSQL and RabbitMQ (Used by PyGeoBench)
+    global PgSQL_CONN, PgSQL_CURS, Msg_Rabiit, MsgChannelPublish, RabiitMQ, Harvest, ConfigPath, jSources, gStatesInterestBBOX, gCitiesInterestBBOX
 
     ### Env Variables
     dotenv.load_dotenv()
@@ -78,26 +323,49 @@ def EnvironmentSetup():
     RabiitMQ = {
         'HOST': os.getenv('Msg_Rabiit_HOST', 'localhost'),
         'PORT': int(os.getenv('Msg_Rabiit_PORT', '5672')),
-        'QUEUE': os.getenv('Msg_Rabiit_QUEUE', 'rabbimq_queue')
+        'QUEUE': os.getenv('Msg_Rabiit_QUEUE', 'rabbimq_queue'),
+        'BATCH': max(1, int(os.getenv('Msg_Rabiit_BATCH', '500'))),
+        'BLOCKED_TIMEOUT': float(os.getenv('Msg_Rabiit_BLOCKED_TIMEOUT', '300'))
+    }
+    Harvest = {
+        'STAC_URL': os.getenv('Harvest_STAC_URL', 'https://planetarycomputer.microsoft.com/api/stac/v1'),
+        'SEARCH_WORKERS': max(1, int(os.getenv('Harvest_SEARCH_WORKERS', '8'))),
+        'RATE_LIMIT': float(os.getenv('Harvest_RATE_LIMIT', '10')), # Requests per Second per Host (0 = Unlimited)
+        'MAX_BACKOFF': float(os.getenv('Harvest_MAX_BACKOFF', '60')),
+        'WINDOW_DEG': float(os.getenv('Harvest_WINDOW_DEG', '1.0')), # Search Window Grid Size in Degrees (0 = One Search per City)
+        'OVERLAP_HOURS': float(os.getenv('Harvest_OVERLAP_HOURS', '72')), # Re-Searched Before the High-Water Mark, for Late Ingested Items
+        'SLICE_DAYS': int(os.getenv('Harvest_SLICE_DAYS', '0')), # Split Long Backfills Into Fixed Time Slices (0 = Single Range)
+        'SIMPLIFY_DEG': float(os.getenv('Harvest_SIMPLIFY_DEG', '0.001')), # Tolerance of the Cached Interest Area Polygons
+        'MIN_OVERLAP': float(os.getenv('Harvest_MIN_OVERLAP', '0')), # Minimum Fraction of the City Covered by an Item (0 = Any Intersection)
+        'META_STORE': os.getenv('Harvest_META_STORE', 'files'), # files = One JSON per Item, segments = Compressed Segment per Collection and Day
+        'INDEX_PARTITIONS': max(1, int(os.getenv('Harvest_INDEX_PARTITIONS', '8'))), # Collection Days of the Item Index Held in Memory
+        'CACHE_TTL': float(os.getenv('Harvest_CACHE_TTL', '21600')), # Seconds a Cached STAC Response is Served (0 = No Cache)
+        'CACHE_MAX_MB': float(os.getenv('Harvest_CACHE_MAX_MB', '512')),
+        'PAGE_SIZE': max(1, int(os.getenv('Harvest_PAGE_SIZE', '100'))), # Items per STAC Page, Sent as the Search limit
+        'PAGE_BUFFER': max(1, int(os.getenv('Harvest_PAGE_BUFFER', '2'))), # Pages a Running Search May Hold Before It Waits for the Sweep
+        'PROCESSES': max(1, int(os.getenv('Harvest_PROCESSES', '1'))), # Worker Processes, Each Harvesting One (State, Collection) at a Time
+        'STATES': [State.strip() for State in os.getenv('Harvest_STATES', '').split(',') if State.strip()], # States Harvested by This Host (Empty = All)
+        'METRICS_PROM_FILE': os.getenv('Harvest_METRICS_PROM_FILE', '') # Prometheus Textfile Written at the End of the Run (Empty = Off)
     }
 
-    ### Postgre Database
-    PgSQL_CONN = psycopg2.connect (
-        host=PostgreSQL['HOST'],
-        port=PostgreSQL['PORT'],
-        user=PostgreSQL['USER'],
-        password=PostgreSQL['PASS'],
-        dbname=PostgreSQL['NAME']
-    )
-    PgSQL_CURS = PgSQL_CONN.cursor()
-
-    ### RabbitMQ
-    Msg_Rabiit = pika.BlockingConnection(pika.ConnectionParameters(
-        host=RabiitMQ['HOST'],
-        port=RabiitMQ['PORT']
-    ))
-    MsgChannelPublish = Msg_Rabiit.channel()
-    MsgChannelPublish.queue_declare(queue=RabiitMQ['QUEUE'], durable=True)
+    if (v_bConnect):
+        ### Postgre Database
+        PgSQL_CONN = psycopg2.connect (
+            host=PostgreSQL['HOST'],
+            port=PostgreSQL['PORT'],
+            user=PostgreSQL['USER'],
+            password=PostgreSQL['PASS'],
+            dbname=PostgreSQL['NAME']
+        )
+        PgSQL_CURS = PgSQL_CONN.cursor()
+
+        ### RabbitMQ
+        Msg_Rabiit = pika.BlockingConnection(pika.ConnectionParameters(
+            host=RabiitMQ['HOST'],
+            port=RabiitMQ['PORT'],
+            blocked_connection_timeout=RabiitMQ['BLOCKED_TIMEOUT']
+        ))
+        MsgChannelPublish = OpenPublishChannel(Msg_Rabiit)
 
     ### Sources Config
     with open(ConfigPath+'Sources.json', 'r') as fConfigFile:
@@ -106,62 +374,294 @@ def EnvironmentSetup():
         jSources = {key:val for key,val in jSources.items() if val['Enabled'] == True}
 
     ### Enabled Brazilian States
-    jStates = []
-    with open(ConfigPath+'Estados_GeoJS.json', 'r') as fConfigFile:
-        jStatesGeoJS = json.load(fConfigFile)
-        jStatesGeoJS = jStatesGeoJS['features']
-
+    StatesGeo = LoadGeometryCache(ConfigPath+'Estados_GeoJS.json', lambda StateGeo: str(StateGeo['id']), Harvest['SIMPLIFY_DEG'])
     with open(ConfigPath+'Estados.json', 'r') as fConfigFile:
         jStatesAll = json.load(fConfigFile)
+    StateSiglas = {int(jState['IBGE']):jState['Sigla'] for jState in jStatesAll}
 
+    ### Interests Areas For States
     for jState in jStatesAll:
         if (jState['Enabled']):
-            jState['features'] = []
-            for StateGeo in jStatesGeoJS:
-                if (StateGeo['id'] == jState['Sigla']):
-                    jState['features'].append(StateGeo)
-                    break
-            jStates.append(jState)
+            GeoIdx = StatesGeo['Index'].get(str(jState['Sigla']))
+            if (GeoIdx is None):
+                print(f"[ERRO] Geometria nao encontrada para {jState['Estado']}")
+                continue
+            gStatesInterestBBOX.append({'id':jState['Sigla'],'name':jState['Estado'],'bbox':StatesGeo['BBOX'][GeoIdx].tolist()})
     del jStatesAll
-    del jStatesGeoJS
+    del StatesGeo
 
     ### Enabled Brazilian Cities
-    jCities = []
-    with open(ConfigPath+'Municipios_GeoJS.json', 'r') as fConfigFile:
-        jCitiesGeoJS = json.load(fConfigFile)
-        jCitiesGeoJS = jCitiesGeoJS['features']
-
+    CitiesGeo = LoadGeometryCache(ConfigPath+'Municipios_GeoJS.json', lambda CityGeo: str(int(CityGeo['properties']['id'])), Harvest['SIMPLIFY_DEG'])
     with open(ConfigPath+'Municipios.json', 'r') as fConfigFile:
         jCitiesAll = json.load(fConfigFile)
 
+    ### Interests Areas For Cities
     for jCity in jCitiesAll:
         if (jCity['Enabled']):
-            jCity['features'] = []
-            for CityGeo in jCitiesGeoJS:
-                if (int(CityGeo['properties']['id']) == int(jCity['Cod_Municipio_Completo'])):
-                    jCity['features'].append(CityGeo)
-                    break
-            jCities.append(jCity)
+            GeoIdx = CitiesGeo['Index'].get(str(int(jCity['Cod_Municipio_Completo'])))
+            if (GeoIdx is None):
+                print(f"[ERRO] Geometria nao encontrada para {jCity['Nome_Municipio']}")
+                continue
+            CityShape = GeometryFromCache(CitiesGeo, GeoIdx)
+            shapely.prepare(CityShape)
+            gCitiesInterestBBOX.append({
+                'id':jCity['Cod_Municipio_Completo'],
+                'name':jCity['Nome_Municipio'],
+                'state':StateSiglas.get(int(jCity['UF']), str(jCity['UF'])),
+                'bbox':CitiesGeo['BBOX'][GeoIdx].tolist(),
+                'geometry':CityShape
+            })
     del jCitiesAll
-    del jCitiesGeoJS
-
-    ### Interests Areas For States
-    gStatesInterestArea = []
-    for itState in jStates:
-        gStatesInterestArea.append(geojson.loads(json.dumps({'type':'FeatureCollection','features':itState['features']})))
-        gStatesInterestBBOX.append({'id':itState['Sigla'],'name':itState['Estado'],'bbox':turfpy.measurement.bbox(gStatesInterestArea[-1])})
-    del gStatesInterestArea
-
-    ### Interests Areas For Cities
-    gCitiesInterestArea = []
-    for itCity in jCities:
-        gCitiesInterestArea.append(geojson.loads(json.dumps({'type':'FeatureCollection','features':itCity['features']})))
-        gCitiesInterestBBOX.append({'id':itCity['Cod_Municipio_Completo'],'name':itCity['Nome_Municipio'],'bbox':turfpy.measurement.bbox(gCitiesInterestArea[-1])})
-    del gCitiesInterestArea
-
-
-def CreateRetrySession(retries=3, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504)):
+    del CitiesGeo
+
+
+def LoadGeometryCache(v_GeoJSFileName, v_FeatureKey, v_SimplifyDeg=0.0):
+    ### Ids, Names, BBOX and Simplified WKB Polygons of a GeoJSON in a NumPy Archive, Rebuilt When the Source Changes
+    CacheFileName = os.path.splitext(v_GeoJSFileName)[0]+'.cache.npz'
+    SourceStat = os.stat(v_GeoJSFileName)
+    SourceStamp = numpy.array([SourceStat.st_mtime_ns, SourceStat.st_size], dtype=numpy.int64)
+
+    GeoCache = None
+    if os.path.isfile(CacheFileName):
+        with numpy.load(CacheFileName) as npCache:
+            if (numpy.array_equal(npCache['SourceStamp'], SourceStamp) and (float(npCache['SimplifyDeg']) == v_SimplifyDeg)):
+                GeoCache = {Key:npCache[Key] for Key in npCache.files}
+
+    if (GeoCache is None):
+        with open(v_GeoJSFileName, 'r') as fConfigFile:
+            jFeatures = json.load(fConfigFile)['features']
+
+        GeoIds = []
+        GeoIdsSeen = set()
+        GeoNames = []
+        GeoShapes = []
+        for jFeature in jFeatures:
+            FeatureKey = v_FeatureKey(jFeature)
+            if FeatureKey in GeoIdsSeen:
+                continue # First Feature Wins, as the Linear Scan Did
+            GeoIdsSeen.add(FeatureKey)
+            GeoIds.append(FeatureKey)
+            GeoNames.append(str((jFeature.get('properties') or {}).get('name', '')))
+            GeoShapes.append(shapely.geometry.shape(jFeature['geometry']))
+        del jFeatures
+
+        GeoShapes = numpy.array(GeoShapes, dtype=object)
+        GeoWkb = shapely.to_wkb(shapely.simplify(GeoShapes, v_SimplifyDeg, preserve_topology=True) if (v_SimplifyDeg > 0) else GeoShapes)
+        GeoCache = {
+            'SourceStamp':SourceStamp,
+            'SimplifyDeg':numpy.array(v_SimplifyDeg),
+            'Ids':numpy.array(GeoIds, dtype=str),
+            'Names':numpy.array(GeoNames, dtype=str),
+            'BBOX':numpy.round(shapely.bounds(GeoShapes), 6), # Full Resolution at geojson Precision, Same as turfpy.measurement.bbox
+            'WkbOffsets':numpy.cumsum([0]+[len(Wkb) for Wkb in GeoWkb], dtype=numpy.int64),
+            'Wkb':numpy.frombuffer(b''.join(GeoWkb), dtype=numpy.uint8)
+        }
+        with open(CacheFileName+'.tmp', 'wb') as fCacheFile:
+            numpy.savez(fCacheFile, **GeoCache)
+        os.replace(CacheFileName+'.tmp', CacheFileName)
+
+    GeoCache['Index'] = {GeoId:GeoIdx for GeoIdx, GeoId in enumerate(GeoCache['Ids'].tolist())}
+    return GeoCache
+
+
+def GeometryFromCache(v_GeoCache, v_GeoIdx):
+    WkbStart, WkbEnd = v_GeoCache['WkbOffsets'][v_GeoIdx], v_GeoCache['WkbOffsets'][v_GeoIdx+1]
+    return shapely.from_wkb(v_GeoCache['Wkb'][WkbStart:WkbEnd].tobytes())
+
+
+class HostRateLimiter:
+    ### Shared Between Search Threads: Spaces Requests per Host and Holds Every Thread on 429
+    def __init__(self, v_RatePerSec=0):
+        self.Interval = (1.0/v_RatePerSec) if (v_RatePerSec > 0) else 0.0
+        self.Lock = threading.Lock()
+        self.NextSlot = {}
+
+    def Acquire(self, v_Host):
+        with self.Lock:
+            Now = time.monotonic()
+            Slot = max(Now, self.NextSlot.get(v_Host, Now))
+            self.NextSlot[v_Host] = Slot + self.Interval
+        if (Slot > Now):
+            time.sleep(Slot - Now)
+
+    def Backoff(self, v_Host, v_Seconds):
+        with self.Lock:
+            self.NextSlot[v_Host] = max(self.NextSlot.get(v_Host, 0.0), time.monotonic() + v_Seconds)
+
+
+def ConnectStateDb(v_StateFileName, v_bCrossThread=False):
+    ### State Files are Shared by the Harvest Worker Processes, WAL Lets Readers Go On While One Process Commits
+    StateConn = sqlite3.connect(v_StateFileName, timeout=120, check_same_thread=not v_bCrossThread)
+    StateConn.execute("PRAGMA journal_mode=WAL;")
+    return StateConn
+
+
+class StacResponseCache:
+    ### Successful STAC Responses on Local Disk Keyed by the Normalized Request, With TTL and Size-Bounded LRU Eviction
+    def __init__(self, v_CacheFileName, v_TTL=0, v_MaxMB=512):
+        self.TTL = v_TTL
+        self.MaxBytes = int(v_MaxMB*1024*1024)
+        self.Hits = 0
+        self.Misses = 0
+        self.Lock = threading.Lock()
+        self.Conn = ConnectStateDb(v_CacheFileName, True)
+        self.Conn.execute("""
+            CREATE TABLE IF NOT EXISTS stac_response_cache (
+                cache_key       TEXT PRIMARY KEY,
+                created_ts      REAL NOT NULL,
+                accessed_ts     REAL NOT NULL,
+                body_size       INTEGER NOT NULL,
+                status_code     INTEGER NOT NULL,
+                headers         TEXT NOT NULL,
+                body            BLOB NOT NULL
+            );
+            """)
+        self.Conn.execute("CREATE INDEX IF NOT EXISTS stac_response_cache_lru ON stac_response_cache (accessed_ts);")
+        self.Conn.execute("DELETE FROM stac_response_cache WHERE created_ts < ?;", (time.time()-self.TTL,))
+        self.Conn.commit()
+        self.CacheBytes = self.StoredBytes()
+
+    def StoredBytes(self):
+        return self.Conn.execute("SELECT COALESCE(SUM(body_size),0) FROM stac_response_cache;").fetchone()[0]
+
+    def Key(self, v_Request):
+        ### Same Search Body With Different Key Order or Spacing Maps to the Same Entry
+        UrlParts = urllib.parse.urlsplit(v_Request.url)
+        NormalizedUrl = urllib.parse.urlunsplit((UrlParts.scheme, UrlParts.netloc, UrlParts.path, urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(UrlParts.query))), ''))
+        NormalizedBody = ''
+        if v_Request.body:
+            try:
+                NormalizedBody = json.dumps(json.loads(v_Request.body), sort_keys=True, separators=(',',':'))
+            except ValueError:
+                NormalizedBody = v_Request.body.decode('UTF-8', 'replace') if isinstance(v_Request.body, bytes) else str(v_Request.body)
+        return hashlib.sha256((v_Request.method+' '+NormalizedUrl+'\n'+NormalizedBody).encode('UTF-8')).hexdigest()
+
+    def Get(self, v_CacheKey, v_Request):
+        with self.Lock:
+            CacheRow = self.Conn.execute(
+                "SELECT status_code, headers, body FROM stac_response_cache WHERE cache_key=? AND created_ts >= ?;",
+                (v_CacheKey, time.time()-self.TTL)).fetchone()
+            if (CacheRow is None):
+                self.Misses += 1
+                return None
+            self.Hits += 1
+            self.Conn.execute("UPDATE stac_response_cache SET accessed_ts=? WHERE cache_key=?;", (time.time(), v_CacheKey))
+            self.Conn.commit()
+
+        response = requests.models.Response()
+        response.status_code = CacheRow[0]
+        response.headers = requests.structures.CaseInsensitiveDict(json.loads(CacheRow[1]))
+        response._content = CacheRow[2]
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.reason = 'OK'
+        response.url = v_Request.url
+        response.request = v_Request
+        return response
+
+    def Put(self, v_CacheKey, v_Response):
+        CacheHeaders = {Key:Val for Key,Val in v_Response.headers.items() if Key.lower() not in ('content-encoding','transfer-encoding','content-length')}
+        with self.Lock:
+            ReplacedRow = self.Conn.execute("SELECT body_size FROM stac_response_cache WHERE cache_key=?;", (v_CacheKey,)).fetchone()
+            self.Conn.execute(
+                "INSERT OR REPLACE INTO stac_response_cache VALUES (?,?,?,?,?,?,?);",
+                (v_CacheKey, time.time(), time.time(), len(v_Response.content), v_Response.status_code, json.dumps(CacheHeaders), v_Response.content))
+            self.CacheBytes += len(v_Response.content) - (ReplacedRow[0] if (ReplacedRow is not None) else 0)
+            if (self.CacheBytes > self.MaxBytes):
+                ### Running Total Misses What Other Harvest Processes Stored or Evicted, Recounted Only Here
+                self.CacheBytes = self.StoredBytes()
+                ### Evict Least Recently Used Until Back Under the Limit
+                while (self.CacheBytes > self.MaxBytes):
+                    EvictRows = self.Conn.execute("SELECT cache_key, body_size FROM stac_response_cache ORDER BY accessed_ts LIMIT 64;").fetchall()
+                    if (len(EvictRows) == 0):
+                        break
+                    for EvictKey, EvictSize in EvictRows:
+                        if (self.CacheBytes <= self.MaxBytes):
+                            break
+                        self.Conn.execute("DELETE FROM stac_response_cache WHERE cache_key=?;", (EvictKey,))
+                        self.CacheBytes -= EvictSize
+            self.Conn.commit()
+
+    def Close(self):
+        with self.Lock:
+            self.Conn.close()
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    def __init__(self, v_RateLimiter=None, v_Retries=3, v_BackoffFactor=1, v_MaxBackoff=60, v_ResponseCache=None, **kwargs):
+        self.RateLimiter = v_RateLimiter
+        self.Retries = v_Retries
+        self.BackoffFactor = v_BackoffFactor
+        self.MaxBackoff = v_MaxBackoff
+        self.ResponseCache = v_ResponseCache
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if (self.ResponseCache is not None):
+            CacheKey = self.ResponseCache.Key(request)
+            response = self.ResponseCache.Get(CacheKey, request)
+            if (response is not None):
+                response.connection = self
+                return response
+            response = self.SendLimited(request, **kwargs)
+            if (response.status_code == 200):
+                self.ResponseCache.Put(CacheKey, response)
+            return response
+        return self.SendLimited(request, **kwargs)
+
+    def SendLimited(self, request, **kwargs):
+        Host = urllib.parse.urlsplit(request.url).netloc
+        for Attempt in range(self.Retries+1):
+            if (self.RateLimiter is not None):
+                self.RateLimiter.Acquire(Host)
+            response = super().send(request, **kwargs)
+            if ((response.status_code != 429) or (Attempt == self.Retries) or (self.RateLimiter is None)):
+                return response
+
+            ### Too Many Requests: Honor Retry-After (Seconds or HTTP Date) for the Whole Host
+            RetryAfter = self.BackoffFactor * (2 ** Attempt)
+            RetryHeader = response.headers.get('Retry-After', '')
+            if RetryHeader.isdigit():
+                RetryAfter = int(RetryHeader)
+            elif (len(RetryHeader) > 0):
+                try:
+                    RetryAfter = (email.utils.parsedate_to_datetime(RetryHeader) - datetime.datetime.now(datetime.UTC)).total_seconds()
+                except (TypeError, ValueError):
+                    pass
+            self.RateLimiter.Backoff(Host, min(max(RetryAfter, 0), self.MaxBackoff))
+            response.close()
+        return response
+
+
+def OpenStacCatalog():
+    ### One Long-Lived Client per Run, Its Connection Pool Sized to the Search Concurrency, Items are Not Signed Here
+    global StacCatalog, StacCache, CachePath, Harvest
+
+    if (StacCatalog is None):
+        if (Harvest['CACHE_TTL'] > 0):
+            StacCache = StacResponseCache(os.path.realpath(CachePath+'Stac.cache.sqlite'), Harvest['CACHE_TTL'], Harvest['CACHE_MAX_MB'])
+        StacIO = pystac_client.stac_api_io.StacApiIO()
+        StacIO.session = CreateRetrySession(
+            rate_limiter=HostRateLimiter(Harvest['RATE_LIMIT']),
+            max_backoff=Harvest['MAX_BACKOFF'],
+            response_cache=StacCache,
+            pool_size=Harvest['SEARCH_WORKERS'])
+        StacCatalog = pystac_client.Client.open(Harvest['STAC_URL'], stac_io=StacIO)
+    return StacCatalog
+
+
+def SignHref(v_Href):
+    ### Signed at Publish Time With the Cached Container Token, Stale SAS Parameters From Older Meta Files are Replaced
+    HrefParts = urllib.parse.urlsplit(v_Href)
+    HrefQuery = [(Key, Val) for Key, Val in urllib.parse.parse_qsl(HrefParts.query, keep_blank_values=True)
+        if Key not in ('st','se','sp','sv','sr','skoid','sktid','skt','ske','sks','skv','sig')]
+    return planetary_computer.sign_url(urllib.parse.urlunsplit(HrefParts._replace(query=urllib.parse.urlencode(HrefQuery))))
+
+
+def CreateRetrySession(retries=3, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504), rate_limiter=None, max_backoff=60, response_cache=None, pool_size=10):
     session = requests.Session()
+    if (rate_limiter is not None):
+        ### 429 is Handled by the Adapter so the Backoff is Shared Across Threads
+        status_forcelist = tuple(Status for Status in status_forcelist if Status != 429)
     retry = Retry(
         total=retries,
         read=retries,
@@ -170,63 +670,696 @@ def CreateRetrySession(retries=3, backoff_factor=1, status_forcelist=(429, 500,
         status_forcelist=status_forcelist,
         allowed_methods=["HEAD", "GET", "POST"]
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    if ((rate_limiter is not None) or (response_cache is not None)):
+        adapter = RateLimitedAdapter(rate_limiter, retries, backoff_factor, max_backoff, response_cache, max_retries=retry, pool_maxsize=pool_size)
+    else:
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_size)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session
 
 
-def GetPlanetaryComputer(v_Source=None, v_dtLoopStart=None, v_dtLoopEnd=None, v_bUpdateCatallog=False):
-    global ExecutionId, ExecutionDt, MetaPath, LogPath, jSources, gCitiesInterestBBOX, FieldDelim
+class SweepCheckpoint:
+    ### Append-Only Record of Finished (Collection, Interest BBOX, Date Range) Units, Lets an Interrupted Sweep Resume
+    def __init__(self, v_CheckpointFileName, v_ExecutionId, v_ExecutionDt):
+        self.CheckpointFileName = v_CheckpointFileName
+        self.ExecutionId = v_ExecutionId
+        self.ExecutionDt = v_ExecutionDt
+        self.Done = set()
+        if os.path.isfile(v_CheckpointFileName):
+            with open(v_CheckpointFileName, 'r') as fCheckpointFile:
+                for CheckpointLine in fCheckpointFile:
+                    try:
+                        jCheckpoint = json.loads(CheckpointLine)
+                    except json.JSONDecodeError:
+                        continue # Truncated by an Interrupted Run
+                    if ('ExecutionId' in jCheckpoint):
+                        ### Resume Under the Interrupted Execution so Its Logs are Completed, Not Orphaned
+                        self.ExecutionId = jCheckpoint['ExecutionId']
+                        self.ExecutionDt = jCheckpoint['ExecutionDt']
+                    else:
+                        self.Done.add((jCheckpoint['collection'], str(jCheckpoint['InterestBBOX_id']), jCheckpoint['datetime']))
+        self.fCheckpointFile = open(v_CheckpointFileName, 'a')
+        if (self.fCheckpointFile.tell() == 0):
+            self.fCheckpointFile.write(json.dumps({'ExecutionId':self.ExecutionId,'ExecutionDt':self.ExecutionDt})+'\n')
+            self.fCheckpointFile.flush()
+
+    def IsDone(self, v_CollectionId, v_InterestBBOX_id, v_dtRangeStr):
+        return (v_CollectionId, str(v_InterestBBOX_id), v_dtRangeStr) in self.Done
+
+    def MarkDone(self, v_CollectionId, v_InterestBBOX_ids, v_dtRangeStr):
+        for InterestBBOX_id in v_InterestBBOX_ids:
+            self.Done.add((v_CollectionId, str(InterestBBOX_id), v_dtRangeStr))
+            self.fCheckpointFile.write(json.dumps({'collection':v_CollectionId,'InterestBBOX_id':InterestBBOX_id,'datetime':v_dtRangeStr})+'\n')
+        self.fCheckpointFile.flush()
+
+    def Close(self, v_bFinished=False):
+        self.fCheckpointFile.close()
+        if (v_bFinished):
+            os.remove(self.CheckpointFileName)
+
+
+class MetaItemIndex:
+    ### Persistent Item Id -> Meta File Name per Collection and Day, Replaces os.walk Over meta/<CollectionId>/<YYYYMMDD>/
+    ### Only the Last v_MaxPartitions Days Used are Held in Memory, Older Ones are Read Back From the Index When Needed
+    def __init__(self, v_IndexFileName, v_MetaPath, v_ShardId=None, v_MaxPartitions=8):
+        self.MetaPath = v_MetaPath
+        self.ShardId = v_ShardId
+        self.MaxPartitions = max(1, v_MaxPartitions)
+        self.Partitions = collections.OrderedDict()
+        bRebuild = not os.path.isfile(v_IndexFileName)
+        self.Conn = ConnectStateDb(v_IndexFileName)
+        self.Conn.execute("""
+            CREATE TABLE IF NOT EXISTS meta_item_index (
+                collection_id   TEXT NOT NULL,
+                item_day        TEXT NOT NULL,
+                item_id         TEXT NOT NULL,
+                meta_file_name  TEXT NOT NULL,
+                PRIMARY KEY (collection_id, item_day, item_id)
+            ) WITHOUT ROWID;
+            """)
+        if (bRebuild):
+            self.Rebuild()
+
+    def Rebuild(self):
+        ### Layout: meta/<CollectionId>/<YYYYMMDD>/<InterestBBOX_id>/<item id>.json or meta/<CollectionId>/<YYYYMMDD>/items.seg
+        for PartitionKey in list(self.Partitions):
+            self.EvictPartition(PartitionKey)
+        self.Conn.execute("DELETE FROM meta_item_index;")
+        for CollectionId in sorted(os.listdir(self.MetaPath)):
+            CollectionPath = os.path.join(self.MetaPath, CollectionId)
+            if not os.path.isdir(CollectionPath):
+                continue
+            for ItemDay in sorted(os.listdir(CollectionPath)):
+                DayPath = os.path.join(CollectionPath, ItemDay)
+                if not os.path.isdir(DayPath):
+                    continue
+                IndexRows = []
+                for root, dirs, files in os.walk(DayPath):
+                    dirs.sort()
+                    for MetaFile in sorted(files):
+                        if MetaFile.endswith('.json'):
+                            IndexRows.append((CollectionId, ItemDay, MetaFile[:-5], os.path.realpath(os.path.join(root, MetaFile))))
+                        elif MetaFile.endswith('.seg'):
+                            for MetaFileName, jMetaFile in ReadMetaSegment(os.path.realpath(os.path.join(root, MetaFile))):
+                                IndexRows.append((CollectionId, ItemDay, jMetaFile['id'], MetaFileName))
+                self.Conn.executemany("INSERT OR IGNORE INTO meta_item_index VALUES (?,?,?,?);", IndexRows)
+        self.Conn.commit()
+
+    def Partition(self, v_CollectionId, v_ItemDay):
+        PartitionKey = (v_CollectionId, v_ItemDay)
+        if PartitionKey in self.Partitions:
+            self.Partitions.move_to_end(PartitionKey)
+        else:
+            while (len(self.Partitions) >= self.MaxPartitions):
+                self.EvictPartition(next(iter(self.Partitions)))
+            self.Partitions[PartitionKey] = dict(self.Conn.execute(
+                "SELECT item_id, meta_file_name FROM meta_item_index WHERE collection_id=? AND item_day=?;",
+                PartitionKey))
+        return self.Partitions[PartitionKey]
+
+    def EvictPartition(self, v_PartitionKey):
+        ### Every Change is Already in the Index Table, Dropping the Cached Day Loses Nothing
+        del self.Partitions[v_PartitionKey]
+
+    def Lookup(self, v_CollectionId, v_ItemDay, v_ItemId):
+        ItemPartition = self.Partition(v_CollectionId, v_ItemDay)
+        FileName = ItemPartition.get(v_ItemId)
+        if ((FileName is None) and (self.ShardId is not None)):
+            ### Another Shard May Have Stored It Since the Partition was Loaded
+            IndexRow = self.Conn.execute(
+                "SELECT meta_file_name FROM meta_item_index WHERE collection_id=? AND item_day=? AND item_id=?;",
+                (v_CollectionId, v_ItemDay, v_ItemId)).fetchone()
+            if (IndexRow is not None):
+                FileName = ItemPartition[v_ItemId] = IndexRow[0]
+        if ((FileName is not None) and (not os.path.isfile(FileName.split('#')[0]))):
+            ### Removed From Disk Since it was Indexed
+            self.Conn.execute("DELETE FROM meta_item_index WHERE collection_id=? AND item_day=? AND item_id=?;", (v_CollectionId, v_ItemDay, v_ItemId))
+            del ItemPartition[v_ItemId]
+            FileName = None
+        return FileName
+
+    def Add(self, v_CollectionId, v_ItemDay, v_ItemId, v_FileName):
+        self.Partition(v_CollectionId, v_ItemDay)[v_ItemId] = v_FileName
+        self.Conn.execute("INSERT OR REPLACE INTO meta_item_index VALUES (?,?,?,?);", (v_CollectionId, v_ItemDay, v_ItemId, v_FileName))
+
+    def ItemName(self, v_CollectionId, v_ItemDay, v_InterestBBOX_id, v_ItemId):
+        return os.path.realpath(os.path.join(self.MetaPath, v_CollectionId, v_ItemDay, str(v_InterestBBOX_id)))+'/'+v_ItemId+'.json'
+
+    def Save(self, v_CollectionId, v_ItemDay, v_CatSearchItem):
+        ### One Pretty-Printed JSON File per Item, Named by ItemName()
+        os.makedirs(os.path.dirname(v_CatSearchItem['_filename']), exist_ok=True)
+        with open(v_CatSearchItem['_filename'],'w') as fConfigFile:
+            fConfigFile.write(json.dumps(v_CatSearchItem,sort_keys=True,indent=4))
+        self.Add(v_CollectionId, v_ItemDay, v_CatSearchItem['id'], v_CatSearchItem['_filename'])
+
+    def MetaFileNames(self):
+        return self.Conn.execute("SELECT collection_id, meta_file_name FROM meta_item_index ORDER BY collection_id, item_day;")
+
+    def BeginWrite(self):
+        ### A Shard Holds the Index Write Lock Until Flush, so Its Lookup Misses Cannot Race Another Shard Saving the Same Item
+        if ((self.ShardId is not None) and (not self.Conn.in_transaction)):
+            self.Conn.execute("BEGIN IMMEDIATE;")
+
+    def Flush(self):
+        self.Conn.commit()
+
+    def Close(self):
+        self.Conn.commit()
+        self.Conn.close()
+
+
+class MetaSegmentStore(MetaItemIndex):
+    ### Append-Only meta/<CollectionId>/<YYYYMMDD>/items.seg per Collection and Day (items.<ShardId>.seg per Shard), Items Named <segment>#<offset>
+    ### Record: 4 Bytes Big-Endian Length + zlib Compressed Compact JSON
+    def __init__(self, v_IndexFileName, v_MetaPath, v_ShardId=None, v_MaxPartitions=8):
+        self.Segments = {}
+        super().__init__(v_IndexFileName, v_MetaPath, v_ShardId, v_MaxPartitions)
+
+    def SegmentFileName(self, v_CollectionId, v_ItemDay):
+        return os.path.realpath(os.path.join(self.MetaPath, v_CollectionId, v_ItemDay, 'items.seg' if (self.ShardId is None) else 'items.'+str(self.ShardId)+'.seg'))
+
+    def Partition(self, v_CollectionId, v_ItemDay):
+        bLoaded = (v_CollectionId, v_ItemDay) in self.Partitions
+        ItemPartition = super().Partition(v_CollectionId, v_ItemDay)
+        if ((not bLoaded) and os.path.isfile(self.SegmentFileName(v_CollectionId, v_ItemDay))):
+            self.Segment(v_CollectionId, v_ItemDay) # A Torn Record is Cut and Forgotten Before the First Lookup of the Day
+        return ItemPartition
+
+    def Segment(self, v_CollectionId, v_ItemDay):
+        SegmentFileName = self.SegmentFileName(v_CollectionId, v_ItemDay)
+        if SegmentFileName not in self.Segments:
+            os.makedirs(os.path.dirname(SegmentFileName), exist_ok=True)
+            if os.path.isfile(SegmentFileName):
+                SegmentEnd = TruncateMetaSegment(SegmentFileName)
+                if (SegmentEnd is not None):
+                    self.ForgetFrom(v_CollectionId, v_ItemDay, SegmentFileName, SegmentEnd)
+            self.Segments[SegmentFileName] = open(SegmentFileName, 'ab')
+        return SegmentFileName, self.Segments[SegmentFileName]
+
+    def EvictPartition(self, v_PartitionKey):
+        ### The Day's Segment is Closed With It, Reopening Checks Its Tail Again
+        fSegmentFile = self.Segments.pop(self.SegmentFileName(*v_PartitionKey), None)
+        if (fSegmentFile is not None):
+            fSegmentFile.close()
+        super().EvictPartition(v_PartitionKey)
+
+    def ForgetFrom(self, v_CollectionId, v_ItemDay, v_SegmentFileName, v_SegmentEnd):
+        ### Index Rows of Cut Records Would Point at the Records Appended in Their Place
+        ItemPartition = self.Partition(v_CollectionId, v_ItemDay)
+        for ItemId, FileName in list(ItemPartition.items()):
+            if (FileName.startswith(v_SegmentFileName+'#') and (int(FileName.rsplit('#', 1)[1]) >= v_SegmentEnd)):
+                self.Conn.execute("DELETE FROM meta_item_index WHERE collection_id=? AND item_day=? AND item_id=?;", (v_CollectionId, v_ItemDay, ItemId))
+                del ItemPartition[ItemId]
+
+    def ItemName(self, v_CollectionId, v_ItemDay, v_InterestBBOX_id, v_ItemId):
+        SegmentFileName, fSegmentFile = self.Segment(v_CollectionId, v_ItemDay)
+        return SegmentFileName+'#'+str(fSegmentFile.tell())
+
+    def Save(self, v_CollectionId, v_ItemDay, v_CatSearchItem):
+        SegmentFileName, fSegmentFile = self.Segment(v_CollectionId, v_ItemDay)
+        MetaRecord = zlib.compress(json.dumps(v_CatSearchItem,sort_keys=True,separators=(',',':')).encode('UTF-8'))
+        fSegmentFile.write(struct.pack('>I', len(MetaRecord)) + MetaRecord)
+        self.Add(v_CollectionId, v_ItemDay, v_CatSearchItem['id'], v_CatSearchItem['_filename'])
+
+    def Flush(self):
+        for fSegmentFile in self.Segments.values():
+            fSegmentFile.flush()
+        super().Flush()
+
+    def Close(self):
+        for fSegmentFile in self.Segments.values():
+            fSegmentFile.close()
+        self.Segments = {}
+        super().Close()
+
+
+def OpenMetaStore(v_StoreType, v_MetaPath, v_ShardId=None, v_MaxPartitions=8):
+    if (v_StoreType == 'segments'):
+        return MetaSegmentStore(os.path.realpath(v_MetaPath+'Items.index.sqlite'), os.path.realpath(v_MetaPath), v_ShardId, v_MaxPartitions)
+    return MetaItemIndex(os.path.realpath(v_MetaPath+'Items.index.sqlite'), os.path.realpath(v_MetaPath), v_ShardId, v_MaxPartitions)
+
+
+def TruncateMetaSegment(v_SegmentFileName):
+    ### Cuts a Record Torn by a Killed Run Before Appending, Records Written After It Would be Unreadable
+    ### Walks the Length Headers Only, the Last Record is Also Decompressed
+    with open(v_SegmentFileName, 'rb+') as fSegmentFile:
+        FileEnd = fSegmentFile.seek(0, os.SEEK_END)
+        RecordOffset = 0
+        LastOffset = None
+        while (RecordOffset+4 <= FileEnd):
+            fSegmentFile.seek(RecordOffset)
+            RecordEnd = RecordOffset+4+struct.unpack('>I', fSegmentFile.read(4))[0]
+            if (RecordEnd > FileEnd):
+                break
+            LastOffset = RecordOffset
+            RecordOffset = RecordEnd
+        if (LastOffset is not None):
+            fSegmentFile.seek(LastOffset)
+            try:
+                zlib.decompress(fSegmentFile.read(RecordOffset-LastOffset)[4:])
+            except zlib.error:
+                RecordOffset = LastOffset
+        if (RecordOffset < FileEnd):
+            fSegmentFile.truncate(RecordOffset)
+            print(f"[INFO] {v_SegmentFileName}: registro incompleto de {FileEnd-RecordOffset} bytes removido")
+            return RecordOffset
+    return None
+
+
+def ReadMetaSegment(v_SegmentFileName):
+    ### Sequential Scan of a Segment, a Record Truncated by an Interrupted Run Ends It
+    with open(v_SegmentFileName, 'rb') as fSegmentFile:
+        while True:
+            RecordOffset = fSegmentFile.tell()
+            RecordHeader = fSegmentFile.read(4)
+            if (len(RecordHeader) < 4):
+                break
+            MetaRecord = fSegmentFile.read(struct.unpack('>I', RecordHeader)[0])
+            try:
+                jMetaFile = json.loads(zlib.decompress(MetaRecord))
+            except zlib.error:
+                break
+            yield v_SegmentFileName+'#'+str(RecordOffset), jMetaFile
+
+
+def ReadMetaItems(v_MetaFileNames):
+    ### Yields (Meta File Name, Item) for JSON Files and Segment Records, Reading Each Segment Once in Offset Order
+    SegmentOffsets = {}
+    for MetaFileName in v_MetaFileNames:
+        if ('#' in MetaFileName):
+            SegmentFileName, RecordOffset = MetaFileName.rsplit('#', 1)
+            SegmentOffsets.setdefault(SegmentFileName, []).append(int(RecordOffset))
+        else:
+            with open(os.path.realpath(MetaFileName), 'r') as fJsonMetaFIle:
+                yield MetaFileName, json.load(fJsonMetaFIle)
+
+    for SegmentFileName, RecordOffsets in SegmentOffsets.items():
+        with open(SegmentFileName, 'rb') as fSegmentFile:
+            for RecordOffset in sorted(RecordOffsets):
+                fSegmentFile.seek(RecordOffset)
+                MetaRecord = fSegmentFile.read(struct.unpack('>I', fSegmentFile.read(4))[0])
+                yield SegmentFileName+'#'+str(RecordOffset), json.loads(zlib.decompress(MetaRecord))
+
+
+class ItemCatalog:
+    ### Harvested Items by Footprint (R-Tree), Date and eo:cloud_cover, Plus the Interest BBOX Each was Logged For
+    ### Answers "Which Scenes Cover City X Between A and B Under N% Cloud" Locally, Without the STAC API
+    def __init__(self, v_CatalogFileName):
+        self.bNew = not os.path.isfile(v_CatalogFileName)
+        self.ItemKeys = {} # Items Upserted Since the Last Flush, Shared by the Interest BBOX in the Same Page
+        self.Conn = ConnectStateDb(v_CatalogFileName)
+        self.Conn.executescript("""
+            CREATE TABLE IF NOT EXISTS catalog_item (
+                item_key        INTEGER PRIMARY KEY,
+                collection_id   TEXT NOT NULL,
+                item_id         TEXT NOT NULL,
+                item_ts         REAL NOT NULL,
+                item_dt         TEXT NOT NULL,
+                cloud_cover     REAL,
+                platform        TEXT,
+                meta_file_name  TEXT NOT NULL,
+                UNIQUE (collection_id, item_id)
+            );
+            CREATE INDEX IF NOT EXISTS catalog_item_ts ON catalog_item (item_ts, cloud_cover);
+            CREATE VIRTUAL TABLE IF NOT EXISTS catalog_item_rtree USING rtree (item_key, min_x, max_x, min_y, max_y);
+            CREATE TABLE IF NOT EXISTS catalog_item_interest (
+                interest_bbox_id    TEXT NOT NULL,
+                item_key            INTEGER NOT NULL,
+                interest_bbox_name  TEXT NOT NULL,
+                overlap             REAL,
+                PRIMARY KEY (interest_bbox_id, item_key)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS catalog_item_interest_name ON catalog_item_interest (interest_bbox_name COLLATE NOCASE);
+            """)
+
+    def Add(self, v_CollectionId, v_CatSearchItem, v_InterestBBOX_id, v_InterestBBOX_name, v_Overlap=None):
+        ### Upsert of the Item (Same Key on Every Execution) and Its Link to the Interest BBOX
+        ItemKey = self.ItemKeys.get((v_CollectionId, v_CatSearchItem['id']))
+        if (ItemKey is None):
+            ItemKey = self.ItemKeys[(v_CollectionId, v_CatSearchItem['id'])] = self.AddItem(v_CollectionId, v_CatSearchItem)
+        self.Conn.execute("INSERT OR REPLACE INTO catalog_item_interest VALUES (?,?,?,?);", (str(v_InterestBBOX_id), ItemKey, v_InterestBBOX_name, v_Overlap))
+
+    def AddItem(self, v_CollectionId, v_CatSearchItem):
+        ItemProps = v_CatSearchItem['properties']
+        dtItem = datetime.datetime.fromisoformat(ItemProps['datetime'])
+        ItemBBOX = v_CatSearchItem.get('bbox') or ItemFootprint(v_CatSearchItem).bounds
+        if (len(ItemBBOX) == 6):
+            ItemBBOX = [ItemBBOX[0], ItemBBOX[1], ItemBBOX[3], ItemBBOX[4]]
+        ItemKey = self.Conn.execute("""
+            INSERT INTO catalog_item (collection_id, item_id, item_ts, item_dt, cloud_cover, platform, meta_file_name) VALUES (?,?,?,?,?,?,?)
+            ON CONFLICT (collection_id, item_id) DO UPDATE SET item_ts=excluded.item_ts, item_dt=excluded.item_dt,
+                cloud_cover=excluded.cloud_cover, platform=excluded.platform, meta_file_name=excluded.meta_file_name
+            RETURNING item_key;
+            """, (v_CollectionId, v_CatSearchItem['id'], dtItem.timestamp(), dtItem.isoformat(),
+                  ItemProps.get('eo:cloud_cover'), ItemProps.get('platform'), v_CatSearchItem['_filename'])).fetchone()[0]
+        self.Conn.execute("INSERT OR REPLACE INTO catalog_item_rtree VALUES (?,?,?,?,?);", (ItemKey, ItemBBOX[0], ItemBBOX[2], ItemBBOX[1], ItemBBOX[3]))
+        return ItemKey
+
+    def Rebuild(self, v_MetaIndex):
+        ### Items Harvested Before the Catalog Existed, Linked to the Interest BBOX They were First Saved For
+        MetaFileCollections = dict((MetaFileName, CollectionId) for CollectionId, MetaFileName in v_MetaIndex.MetaFileNames()
+            if os.path.isfile(MetaFileName.split('#')[0]))
+        for MetaFileName, jMetaFile in ReadMetaItems(list(MetaFileCollections)):
+            jMetaFile['_filename'] = MetaFileName
+            self.Add(MetaFileCollections[MetaFileName], jMetaFile, jMetaFile['_query']['InterestBBOX_id'], jMetaFile['_query']['InterestBBOX_name'], jMetaFile.get('_overlap'))
+        self.Flush()
+        if (len(MetaFileCollections) > 0):
+            print(f"[INFO] Catalogo de itens reconstruido: {len(MetaFileCollections)} itens")
+
+    def Search(self, v_InterestBBOX=None, v_BBOX=None, v_dtStart=None, v_dtEnd=None, v_MaxCloudCover=None, v_CollectionIds=None, v_Limit=None):
+        ### v_InterestBBOX is an Interest BBOX id or Name (Items Logged For It), v_BBOX Any [minx, miny, maxx, maxy] Intersecting the Footprint
+        ### Items Without eo:cloud_cover are Left Out When v_MaxCloudCover is Given
+        SqlFrom = ["catalog_item i"]
+        SqlWhere = []
+        SqlArgs = []
+        SqlColumns = "i.collection_id, i.item_id, i.item_dt, i.cloud_cover, i.platform, i.meta_file_name, r.min_x, r.min_y, r.max_x, r.max_y"
+        if (v_InterestBBOX is not None):
+            SqlFrom.append("catalog_item_interest c ON c.item_key = i.item_key")
+            SqlWhere.append("(c.interest_bbox_id = ? OR c.interest_bbox_name = ? COLLATE NOCASE)")
+            SqlArgs += [str(v_InterestBBOX), str(v_InterestBBOX)]
+            SqlColumns += ", c.interest_bbox_id, c.interest_bbox_name, c.overlap"
+        SqlFrom.append("catalog_item_rtree r ON r.item_key = i.item_key")
+        if (v_BBOX is not None):
+            SqlWhere.append("r.min_x <= ? AND r.max_x >= ? AND r.min_y <= ? AND r.max_y >= ?")
+            SqlArgs += [v_BBOX[2], v_BBOX[0], v_BBOX[3], v_BBOX[1]]
+        if (v_dtStart is not None):
+            SqlWhere.append("i.item_ts >= ?")
+            SqlArgs.append(v_dtStart.timestamp())
+        if (v_dtEnd is not None):
+            SqlWhere.append("i.item_ts <= ?")
+            SqlArgs.append(v_dtEnd.timestamp())
+        if (v_MaxCloudCover is not None):
+            SqlWhere.append("i.cloud_cover <= ?")
+            SqlArgs.append(v_MaxCloudCover)
+        if v_CollectionIds:
+            SqlWhere.append("i.collection_id IN ("+','.join('?'*len(v_CollectionIds))+")")
+            SqlArgs += list(v_CollectionIds)
+        SqlQuery = "SELECT "+SqlColumns+" FROM "+" JOIN ".join(SqlFrom)
+        if (len(SqlWhere) > 0):
+            SqlQuery += " WHERE "+" AND ".join(SqlWhere)
+        SqlQuery += " ORDER BY i.item_ts, i.collection_id, i.item_id"
+        if (v_Limit is not None):
+            SqlQuery += " LIMIT "+str(int(v_Limit))
+
+        CatalogItems = []
+        for DbItem in self.Conn.execute(SqlQuery+";", SqlArgs):
+            jCatalogItem = {
+                'CollectionId':DbItem[0],
+                'ItemId':DbItem[1],
+                'ItemDt':DbItem[2],
+                'CloudCover':DbItem[3],
+                'Platform':DbItem[4],
+                'MetaFileName':DbItem[5],
+                'BBOX':[DbItem[6], DbItem[7], DbItem[8], DbItem[9]]
+            }
+            if (v_InterestBBOX is not None):
+                jCatalogItem.update({'InterestBBOXId':DbItem[10], 'InterestBBOXName':DbItem[11], 'Overlap':DbItem[12]})
+            CatalogItems.append(jCatalogItem)
+        return CatalogItems
+
+    def Flush(self):
+        self.Conn.commit()
+        self.ItemKeys = {}
+
+    def Close(self):
+        self.Conn.commit()
+        self.Conn.close()
+
+
+def OpenItemCatalog(v_MetaPath, v_MetaIndex=None):
+    ### A New Catalog is Filled From the Meta Store When the Index is Given
+    Catalog = ItemCatalog(os.path.realpath(v_MetaPath+'Items.catalog.sqlite'))
+    if (Catalog.bNew and (v_MetaIndex is not None)):
+        Catalog.Rebuild(v_MetaIndex)
+    return Catalog
+
+
+class HarvestHighWater:
+    ### Latest properties.datetime Seen and Range End Searched per (Collection, Interest BBOX), Next Sweeps Start From There
+    def __init__(self, v_StateFileName, v_CollectionIds=None):
+        self.Conn = ConnectStateDb(v_StateFileName)
+        self.Conn.execute("""
+            CREATE TABLE IF NOT EXISTS harvest_high_water (
+                collection_id       TEXT NOT NULL,
+                interest_bbox_id    TEXT NOT NULL,
+                high_water_dt       TEXT,
+                searched_until_dt   TEXT,
+                PRIMARY KEY (collection_id, interest_bbox_id)
+            ) WITHOUT ROWID;
+            """)
+        ### A Shard Job Loads Only Its Collections, Not the Marks of Every (Collection, Interest BBOX)
+        self.Marks = {}
+        MarksQuery = "SELECT * FROM harvest_high_water"
+        MarksArgs = []
+        if (v_CollectionIds is not None):
+            MarksQuery += " WHERE collection_id IN ("+','.join('?'*len(v_CollectionIds))+")"
+            MarksArgs = list(v_CollectionIds)
+        for CollectionId, InterestBBOX_id, HighWaterDt, SearchedUntilDt in self.Conn.execute(MarksQuery+";", MarksArgs):
+            self.Marks[(CollectionId, InterestBBOX_id)] = [
+                datetime.datetime.fromisoformat(HighWaterDt) if HighWaterDt else None,
+                datetime.datetime.fromisoformat(SearchedUntilDt) if SearchedUntilDt else None
+            ]
+        self.Dirty = set()
+
+    def SearchStart(self, v_CollectionId, v_Members, v_dtSweepStart, v_OverlapHours=0):
+        ### Earliest Start Among the Window Members, Never Before the Sweep Start
+        dtStart = None
+        for Member in v_Members:
+            MemberMarks = [dtMark for dtMark in self.Marks.get((v_CollectionId, str(Member['id'])), [None, None]) if (dtMark is not None)]
+            if (len(MemberMarks) == 0):
+                return v_dtSweepStart
+            dtMark = max(MemberMarks)
+            dtMark = dtMark - datetime.timedelta(hours=v_OverlapHours)
+            if ((dtStart is None) or (dtMark < dtStart)):
+                dtStart = dtMark
+        return max(dtStart, v_dtSweepStart) if (dtStart is not None) else v_dtSweepStart
+
+    def Update(self, v_CollectionId, v_InterestBBOX_id, v_dtItem=None, v_dtSearchedUntil=None):
+        Mark = self.Marks.setdefault((v_CollectionId, str(v_InterestBBOX_id)), [None, None])
+        if ((v_dtItem is not None) and ((Mark[0] is None) or (v_dtItem > Mark[0]))):
+            Mark[0] = v_dtItem
+        if ((v_dtSearchedUntil is not None) and ((Mark[1] is None) or (v_dtSearchedUntil > Mark[1]))):
+            Mark[1] = v_dtSearchedUntil
+        self.Dirty.add((v_CollectionId, str(v_InterestBBOX_id)))
+
+    def Close(self, v_bSave=True):
+        if (not v_bSave):
+            self.Conn.close()
+            return
+        self.Conn.executemany(
+            "INSERT OR REPLACE INTO harvest_high_water VALUES (?,?,?,?);",
+            [(MarkKey[0], MarkKey[1],
+              self.Marks[MarkKey][0].isoformat() if (self.Marks[MarkKey][0] is not None) else None,
+              self.Marks[MarkKey][1].isoformat() if (self.Marks[MarkKey][1] is not None) else None) for MarkKey in sorted(self.Dirty)])
+        self.Conn.commit()
+        self.Conn.close()
+
+
+def FloorToSliceGrid(v_dt, v_SliceDays=1):
+    ### Midnight Opening the v_SliceDays Slice That Holds v_dt, on a Grid Anchored at 1970-01-01
+    DayNumber = v_dt.toordinal() - datetime.date(1970, 1, 1).toordinal()
+    return v_dt.replace(hour=0, minute=0, second=0, microsecond=0) - datetime.timedelta(days=DayNumber % max(1, v_SliceDays))
+
+
+def SplitDateRange(v_dtStart, v_dtEnd, v_SliceDays=0):
+    ### Slice Edges Fall on the Grid of FloorToSliceGrid, Sweeps Starting at Different Points Search the Same Slices
+    if ((v_SliceDays <= 0) or (v_dtStart >= v_dtEnd)):
+        return [(v_dtStart, v_dtEnd)]
+    DateSlices = []
+    dtSliceStart = v_dtStart
+    while (dtSliceStart <= v_dtEnd):
+        dtNextStart = FloorToSliceGrid(dtSliceStart, v_SliceDays) + datetime.timedelta(days=v_SliceDays)
+        DateSlices.append((dtSliceStart, min(dtNextStart - datetime.timedelta(seconds=1), v_dtEnd)))
+        dtSliceStart = dtNextStart
+    return DateSlices
+
+
+def PlanSearchWindows(v_InterestBBOXArr, v_WindowDeg=0):
+    ### Groups Interest Areas by the Grid Cell of Their BBOX Center, Each Window Covers the Union of its Members BBOX
+    if (v_WindowDeg <= 0):
+        return [{'id':gInterestBBOX['id'],'name':gInterestBBOX['name'],'bbox':gInterestBBOX['bbox'],'members':[gInterestBBOX]} for gInterestBBOX in v_InterestBBOXArr]
+
+    GridCells = {}
+    for gInterestBBOX in v_InterestBBOXArr:
+        CellX = math.floor(((gInterestBBOX['bbox'][0]+gInterestBBOX['bbox'][2])/2)/v_WindowDeg)
+        CellY = math.floor(((gInterestBBOX['bbox'][1]+gInterestBBOX['bbox'][3])/2)/v_WindowDeg)
+        GridCells.setdefault((CellX, CellY), []).append(gInterestBBOX)
+
+    SearchWindows = []
+    for Members in GridCells.values():
+        SearchWindows.append({
+            'id':Members[0]['id'],
+            'name':Members[0]['name'] if (len(Members) == 1) else Members[0]['name']+' (+'+str(len(Members)-1)+')',
+            'bbox':[
+                min(Member['bbox'][0] for Member in Members),
+                min(Member['bbox'][1] for Member in Members),
+                max(Member['bbox'][2] for Member in Members),
+                max(Member['bbox'][3] for Member in Members)
+            ],
+            'members':Members
+        })
+    return SearchWindows
+
+
+def ItemFootprint(v_CatSearchItem):
+    if (v_CatSearchItem.get('geometry') is not None):
+        return shapely.geometry.shape(v_CatSearchItem['geometry'])
+    ItemBBOX = v_CatSearchItem['bbox']
+    if (len(ItemBBOX) == 6):
+        ItemBBOX = [ItemBBOX[0], ItemBBOX[1], ItemBBOX[3], ItemBBOX[4]]
+    return shapely.box(*ItemBBOX)
+
+
+def AssignItemsToInterest(v_CatSearchItems, v_SearchWindow, v_MinOverlap=0.0):
+    ### Yields (Interest BBOX, Items Overlapping its Polygon, Overlap Fractions) for Every Member of the Window, Keeping Items Order
+    Members = v_SearchWindow['members']
+    if (len(v_CatSearchItems) == 0):
+        return
+
+    ItemFootprints = numpy.array([ItemFootprint(CatSearchItem) for CatSearchItem in v_CatSearchItems], dtype=object)
+    if (len(Members) == 1):
+        MemberCandidates = {0:numpy.arange(len(v_CatSearchItems))}
+    else:
+        MembersTree = shapely.STRtree([shapely.box(*Member['bbox']) for Member in Members])
+        ItemIdx, MemberIdx = MembersTree.query(ItemFootprints, predicate='intersects')
+        MemberCandidates = {itMember:numpy.sort(ItemIdx[MemberIdx == itMember]) for itMember in numpy.unique(MemberIdx).tolist()}
+
+    for itMember, Member in enumerate(Members):
+        if (itMember not in MemberCandidates):
+            continue
+        Candidates = MemberCandidates[itMember]
+        CandidateShapes = ItemFootprints[Candidates]
+        MemberShape = Member.get('geometry')
+        if (MemberShape is None):
+            MemberShape = shapely.box(*Member['bbox'])
+
+        ### Overlap is the Fraction of the Interest Area Covered by the Item Footprint
+        bIntersects = shapely.intersects(MemberShape, CandidateShapes) # Prepared City First, Shapely Only Uses the First Argument's Prepared State
+        Overlaps = numpy.zeros(len(Candidates))
+        if (shapely.area(MemberShape) > 0):
+            Overlaps[bIntersects] = shapely.area(shapely.intersection(CandidateShapes[bIntersects], MemberShape)) / shapely.area(MemberShape)
+        else:
+            Overlaps[bIntersects] = 1.0
+        bKeep = bIntersects & (Overlaps >= v_MinOverlap)
+        if bKeep.any():
+            yield Member, [v_CatSearchItems[itItem] for itItem in Candidates[bKeep].tolist()], Overlaps[bKeep].tolist()
+
+
+def SearchConcurrent(v_Catalog, v_SearchUnits, v_Workers=1, v_PageSize=None, v_PageBuffer=2):
+    ### Runs STAC Searches in a Bounded Thread Pool, Yielding (Unit, Pages) in Submission Order
+    ### Each Search Streams Its Pages Through a Queue of v_PageBuffer Pages and Waits While It is Full, so at Most
+    ### v_Workers*(v_PageBuffer+1) Pages are in Memory However Long the Date Range is
+    global Metrics
+
+    bCancel = threading.Event()
+    EndOfPages = object()
+
+    def PutPage(v_PageQueue, v_jPage):
+        while not bCancel.is_set():
+            try:
+                v_PageQueue.put(v_jPage, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def SearchUnit(v_PageQueue, v_CollectionId, v_SearchWindow, v_dtRangeStr):
+        dtSearch = 0.0
+        try:
+            CatSearch = v_Catalog.search(collections=[v_CollectionId], bbox=v_SearchWindow['bbox'], datetime=v_dtRangeStr, limit=v_PageSize)
+            dtPage = time.perf_counter()
+            for jPage in CatSearch.pages_as_dicts():
+                dtPage = time.perf_counter()-dtPage
+                dtSearch += dtPage
+                Metrics.Observe('stac_page', dtPage, v_CollectionId)
+                Metrics.Count('stac_pages', 1, v_CollectionId)
+                Metrics.Count('stac_items', len(jPage['features']), v_CollectionId)
+                if not PutPage(v_PageQueue, jPage['features']):
+                    return
+                dtPage = time.perf_counter() # Time Blocked on a Full Queue is Not Search Latency
+            Metrics.Observe('stac_search', dtSearch, v_CollectionId, v_SearchWindow['name'])
+            PutPage(v_PageQueue, EndOfPages)
+        except Exception as e:
+            PutPage(v_PageQueue, e)
+
+    def UnitPages(v_PageQueue):
+        while True:
+            jPage = v_PageQueue.get()
+            if (jPage is EndOfPages):
+                return
+            if isinstance(jPage, Exception):
+                raise jPage
+            yield jPage
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=v_Workers) as SearchPool:
+        try:
+            Pending = collections.deque()
+            for SearchUnitArgs in v_SearchUnits:
+                PageQueue = queue.Queue(maxsize=v_PageBuffer)
+                SearchPool.submit(SearchUnit, PageQueue, *SearchUnitArgs)
+                Pending.append((SearchUnitArgs, PageQueue))
+                if (len(Pending) >= v_Workers*2):
+                    SearchUnitArgs, PageQueue = Pending.popleft()
+                    yield SearchUnitArgs, UnitPages(PageQueue)
+            while Pending:
+                SearchUnitArgs, PageQueue = Pending.popleft()
+                yield SearchUnitArgs, UnitPages(PageQueue)
+        finally:
+            bCancel.set() # Searches Still Running are Not Left Blocked on a Queue Nobody Reads
+
+
+def UpdatePlanetaryComputerCollections(v_Source, v_Catalog):
+    global MetaPath, jSources
 
     SourceData = jSources[v_Source]
     MetaFileName = os.path.realpath(MetaPath+SourceData['SysName']+'_'+'Collections.meta.json')
-    dtRangeStr = v_dtLoopStart.astimezone().isoformat()+'/'+v_dtLoopEnd.astimezone().isoformat()
 
-    planetarycomputer_catalog = pystac_client.Client.open(
-        "https://planetarycomputer.microsoft.com/api/stac/v1",
-        modifier=planetary_computer.sign_inplace)
-    planetarycomputer_catalog._stac_io.session = CreateRetrySession()
+    ### Organize Collections in Meta File Keeping Enable Status
+    ArrCollections = []
+    jCollections = []
 
-    if (v_bUpdateCatallog):
-        ### Organize Collections in Meta File Keeping Enable Status
-        ArrCollections = []
-        jCollections = []
-
-        if os.path.exists(MetaFileName):
-            with open(MetaFileName, 'r') as fConfigFile:
-                jCollections = json.load(fConfigFile)
-
-        for collection in list(planetarycomputer_catalog.get_collections()):
-            DctCollection = collection.to_dict()
-            ItEnabled = True
-            LocalData = None
-            for Collection in jCollections:
-                if (Collection['CollectionId'] == DctCollection['id']):
-                    LocalData = Collection
-                    break
-            if (LocalData is not None):
-                if ('Enabled' in LocalData):
-                    ItEnabled = LocalData['Enabled']
-
-            jCollection = {
-                'Enabled':ItEnabled,
-                '_dt_update':datetime.datetime.now(datetime.UTC).astimezone().isoformat(),
-                '_ts_update':int(datetime.datetime.now(datetime.UTC).timestamp()),
-                '_id':DctCollection['id'],
-                'Source':v_Source,
-                'CollectionId':DctCollection['id'],
-                'Title':DctCollection['title'],
-                'Type':DctCollection['type'],
-                'StacVersion':DctCollection['stac_version']
-            }
+    if os.path.exists(MetaFileName):
+        with open(MetaFileName, 'r') as fConfigFile:
+            jCollections = json.load(fConfigFile)
+
+    for collection in v_Catalog.get_collections():
+        DctCollection = collection.to_dict()
+        ItEnabled = True
+        LocalData = None
+        for Collection in jCollections:
+            if (Collection['CollectionId'] == DctCollection['id']):
+                LocalData = Collection
+                break
+        if (LocalData is not None):
+            if ('Enabled' in LocalData):
+                ItEnabled = LocalData['Enabled']
+
+        jCollection = {
+            'Enabled':ItEnabled,
+            '_dt_update':datetime.datetime.now(datetime.UTC).astimezone().isoformat(),
+            '_ts_update':int(datetime.datetime.now(datetime.UTC).timestamp()),
+            '_id':DctCollection['id'],
+            'Source':v_Source,
+            'CollectionId':DctCollection['id'],
+            'Title':DctCollection['title'],
+            'Type':DctCollection['type'],
+            'StacVersion':DctCollection['stac_version']
+        }
+
+        ArrCollections.append(jCollection)
+    ArrCollections.sort(key=lambda itItem: itItem["CollectionId"])
+    with open(MetaFileName,'w') as fConfigFile:
+        fConfigFile.write(json.dumps(ArrCollections,sort_keys=True,indent=4))
+    del ArrCollections
+    del jCollections
+
+
+def EnabledCollections(v_Source):
+    global MetaPath, jSources
 
-            ArrCollections.append(jCollection)
-        ArrCollections.sort(key=lambda itItem: itItem["CollectionId"])
-        with open(MetaFileName,'w') as fConfigFile:
-            fConfigFile.write(json.dumps(ArrCollections,sort_keys=True,indent=4))
-        del ArrCollections
-        del jCollections
+    SourceData = jSources[v_Source]
+    MetaFileName = os.path.realpath(MetaPath+SourceData['SysName']+'_'+'Collections.meta.json')
 
     ### Get Updated and Enabled Collections
     jCollections = []
@@ -234,210 +1367,658 @@ def GetPlanetaryComputer(v_Source=None, v_dtLoopStart=None, v_dtLoopEnd=None, v_
         for Collections in json.load(fConfigFile):
             if (Collections['Enabled'] == True):
                 jCollections.append(Collections)
+    return jCollections
 
-    ### Get Metadata for Selected Dates, Collections and Interests BBOX
-    LogDataArr = []
-    for collection in jCollections:
-        CollectionId = collection['CollectionId']
-        for gInterestBBOX in gCitiesInterestBBOX:
-            try:
-                CatSearch = planetarycomputer_catalog.search(collections=[CollectionId], bbox=gInterestBBOX['bbox'], datetime=dtRangeStr)
-                for CatSearchItem in CatSearch.items_as_dicts():
-                    #CatSearchItem['_id'] = CatSearchItem['id']
-                    CatSearchItem['_id'] = str(hashlib.md5((ExecutionDt+CatSearchItem['id']).encode('UTF-8')).hexdigest())
-                    CatSearchItem['_dt_update'] = datetime.datetime.now(datetime.UTC).astimezone().isoformat()
-                    CatSearchItem['_ts_update'] = int(datetime.datetime.now(datetime.UTC).timestamp())
-                    CatSearchItem['_query'] = {
-                        'collection':CollectionId,
-                        'InterestBBOX_id':gInterestBBOX['id'],
-                        'InterestBBOX_name':gInterestBBOX['name'],
-                        'datetime':dtRangeStr
-                    }
-                    CatSearchItem['_log_unique_id'] = str(hashlib.md5((CollectionId+str(gInterestBBOX['id'])+gInterestBBOX['name']+dtRangeStr+CatSearchItem['id']).encode('UTF-8')).hexdigest())
-
-                    dtItem = datetime.datetime.fromisoformat(CatSearchItem['properties']['datetime'])
-                    SavePath = os.path.realpath(MetaPath+CollectionId+'/'+dtItem.strftime("%Y%m%d")+'/'+str(gInterestBBOX['id']))
-                    FileName = SavePath+'/'+CatSearchItem['id']+'.json'
-
-                    ### Search For Duplicated Files
-                    bFileExists = False
-                    ActualFileName = FileName
-                    for root, dirs, files in os.walk(os.path.realpath(MetaPath+CollectionId+'/'+dtItem.strftime("%Y%m%d")+'/')):
-                        if CatSearchItem['id']+'.json' in files:
-                            bFileExists = True
-                            ActualFileName = os.path.join(root, CatSearchItem['id']+'.json')
-                    CatSearchItem['_filename'] = ActualFileName
-
-                    ### Save Reference Log to Array
-                    jLogData = {
-                        'LogUniqueId':CatSearchItem['_log_unique_id'],
-                        'ExecutionId':ExecutionId,
-                        'ExecutionDt':ExecutionDt,
-                        'CollectionId':CollectionId,
-                        'InterestBBOXId':gInterestBBOX['id'],
-                        'InterestBBOXName':gInterestBBOX['name'],
-                        'SearchRangeStartDt':v_dtLoopStart.astimezone().isoformat(),
-                        'SearchRangeEndDt':v_dtLoopEnd.astimezone().isoformat(),
-                        'MetaFileUniqueId':CatSearchItem['_id'],
-                        'MetaFileDt':dtItem.isoformat(),
-                        'MetaFileName':CatSearchItem['_filename']
-                    }
-                    LogDataArr.append(jLogData)
-
-                    ### Save File Locally
-                    if (not bFileExists):
-                        os.makedirs(SavePath, exist_ok=True)
-                        with open(FileName,'w') as fConfigFile:
-                            fConfigFile.write(json.dumps(CatSearchItem,sort_keys=True,indent=4))
-            except requests.exceptions.RequestException as e:
-                print(f"[ERRO] Falha ao buscar {CollectionId} para {gInterestBBOX['name']}: {e}")
-                continue
 
-    ### Save Log File (as CSV)
-    LogFileName = LogPath+SourceData['SysName']+'_'+str(CollectionId)+'_'+str(ExecutionId)+'.csv'
-    with open(os.path.realpath(LogFileName),'w') as fCsvLogFile:
-        fCsvLogFile.write(DictArrayToCsv(LogDataArr, FieldDelim))
+def GetPlanetaryComputer(v_Source=None, v_dtLoopStart=None, v_dtLoopEnd=None, v_bUpdateCatallog=False, v_ShardId=None, v_CollectionIds=None):
+    ### Sweeps the Enabled Collections Over gCitiesInterestBBOX, a Shard Restricts It to Some Collections and Names Its Files After v_ShardId
+    ### Returns False When a Search Failed and the Sweep Must be Resumed
+    global ExecutionId, ExecutionDt, MetaPath, LogPath, jSources, gCitiesInterestBBOX, FieldDelim, LogFieldNames, AssetFieldNames, Harvest, StacCache, Metrics
 
+    SourceData = jSources[v_Source]
+    dtRangeStr = v_dtLoopStart.astimezone().isoformat()+'/'+v_dtLoopEnd.astimezone().isoformat()
 
-def ProcessPlanetaryComputer(v_Source=None):
-    global ExecutionId, LogPath, MetaPath, jSources, FieldDelim, PgSQL_CONN, PgSQL_CURS, MsgChannelPublish, RabiitMQ
+    planetarycomputer_catalog = OpenStacCatalog()
 
-    SourceData = jSources[v_Source]
-    MetaFileName = os.path.realpath(MetaPath+SourceData['SysName']+'_'+'Collections.meta.json')
+    if (v_bUpdateCatallog):
+        UpdatePlanetaryComputerCollections(v_Source, planetarycomputer_catalog)
 
-    ### Get Updated and Enabled Collections
-    jCollections = []
-    with open(MetaFileName, 'r') as fConfigFile:
-        for Collections in json.load(fConfigFile):
-            if (Collections['Enabled'] == True):
-                jCollections.append(Collections)
+    jCollections = EnabledCollections(v_Source)
+    if (v_CollectionIds is not None):
+        jCollections = [collection for collection in jCollections if collection['CollectionId'] in v_CollectionIds]
 
-    for collection in jCollections:
-        CollectionId = collection['CollectionId']
+    ### Get Metadata for Selected Dates, Collections and Interests BBOX
+    MetaIndex = OpenMetaStore(Harvest['META_STORE'], MetaPath, v_ShardId, Harvest['INDEX_PARTITIONS'])
+    Catalog = OpenItemCatalog(MetaPath, MetaIndex)
+    SearchWindows = PlanSearchWindows(gCitiesInterestBBOX, Harvest['WINDOW_DEG'])
+    HighWater = HarvestHighWater(os.path.realpath(MetaPath+'Harvest.state.sqlite'), [collection['CollectionId'] for collection in jCollections])
+
+    ### Skip Units Finished by an Interrupted Sweep Over the Same Date Range
+    CheckpointKey = dtRangeStr
+    if (v_ShardId is not None):
+        CheckpointKey = dtRangeStr+'|'+str(v_ShardId)+'|'+','.join(collection['CollectionId'] for collection in jCollections)
+    Checkpoint = SweepCheckpoint(
+        os.path.realpath(LogPath+SourceData['SysName']+'_'+str(hashlib.md5(CheckpointKey.encode('UTF-8')).hexdigest())+'.checkpoint'),
+        ExecutionId, ExecutionDt)
+    ExecutionId = Checkpoint.ExecutionId
+    ExecutionDt = Checkpoint.ExecutionDt
+
+    def PlanSearchUnits():
+        ### Planned Lazily as Searches are Submitted, a Window's Start is Read Before Any of Its Units is Processed
+        for collection in jCollections:
+            for SearchWindow in SearchWindows:
+                dtUnitStart = HighWater.SearchStart(collection['CollectionId'], SearchWindow['members'], v_dtLoopStart.astimezone(), Harvest['OVERLAP_HOURS'])
+                ### Floored Onto the Slice Grid so Reruns Send the Same Search Bodies and are Served by StacCache
+                dtUnitStart = max(FloorToSliceGrid(dtUnitStart.astimezone(), Harvest['SLICE_DAYS']), v_dtLoopStart.astimezone())
+                for dtSliceStart, dtSliceEnd in SplitDateRange(dtUnitStart, v_dtLoopEnd.astimezone(), Harvest['SLICE_DAYS']):
+                    dtUnitRangeStr = dtSliceStart.isoformat()+'/'+dtSliceEnd.isoformat()
+                    if not all(Checkpoint.IsDone(collection['CollectionId'], Member['id'], dtUnitRangeStr) for Member in SearchWindow['members']):
+                        yield (collection['CollectionId'], SearchWindow, dtUnitRangeStr)
+
+    ### One Log File per Collection, as Expected by ProcessPlanetaryComputer
+    LogSink = None
+    AssetSink = None
+    LogSinkCollectionId = None
+    bSweepFailed = False
+    for (CollectionId, SearchWindow, dtUnitRangeStr), SearchPages in SearchConcurrent(planetarycomputer_catalog, PlanSearchUnits(),
+        Harvest['SEARCH_WORKERS'], Harvest['PAGE_SIZE'], Harvest['PAGE_BUFFER']):
+        if (CollectionId != LogSinkCollectionId):
+            if (LogSink is not None):
+                LogSink.Close()
+                AssetSink.Close()
+            LogFileName = LogPath+SourceData['SysName']+'_'+str(CollectionId)+'_'+str(ExecutionId)+('.csv' if (v_ShardId is None) else '.'+str(v_ShardId)+'.csv')
+            LogSink = CsvLogSink(os.path.realpath(LogFileName), LogFieldNames, FieldDelim)
+            AssetSink = CsvLogSink(os.path.realpath(LogFileName[:-4]+'.assets.csv'), AssetFieldNames, FieldDelim)
+            LogSinkCollectionId = CollectionId
+
+        ### Page by Page: Nothing Outlives the Page it Came In Besides the Log and Meta Files
+        try:
+            for CatSearchPage in SearchPages:
+                with Metrics.Timer('assign_items', CollectionId):
+                    AssignedItems = list(AssignItemsToInterest(CatSearchPage, SearchWindow, Harvest['MIN_OVERLAP']))
+                MetaIndex.BeginWrite()
+                for gInterestBBOX, CatSearchItems, ItemOverlaps in AssignedItems:
+                    if Checkpoint.IsDone(CollectionId, gInterestBBOX['id'], dtUnitRangeStr):
+                        continue
+                    for CatSearchItem, ItemOverlap in zip(CatSearchItems, ItemOverlaps):
+                        #CatSearchItem['_id'] = CatSearchItem['id']
+                        CatSearchItem['_id'] = str(hashlib.md5((ExecutionDt+CatSearchItem['id']).encode('UTF-8')).hexdigest())
+                        CatSearchItem['_dt_update'] = datetime.datetime.now(datetime.UTC).astimezone().isoformat()
+                        CatSearchItem['_ts_update'] = int(datetime.datetime.now(datetime.UTC).timestamp())
+                        CatSearchItem['_query'] = {
+                            'collection':CollectionId,
+                            'InterestBBOX_id':gInterestBBOX['id'],
+                            'InterestBBOX_name':gInterestBBOX['name'],
+                            'datetime':dtUnitRangeStr
+                        }
+                        CatSearchItem['_log_unique_id'] = str(hashlib.md5((CollectionId+str(gInterestBBOX['id'])+gInterestBBOX['name']+dtUnitRangeStr+CatSearchItem['id']).encode('UTF-8')).hexdigest())
+
+                        dtItem = datetime.datetime.fromisoformat(CatSearchItem['properties']['datetime'])
+
+                        ### Search For Duplicated Files
+                        with Metrics.Timer('dedup_lookup', CollectionId):
+                            ActualFileName = MetaIndex.Lookup(CollectionId, dtItem.strftime("%Y%m%d"), CatSearchItem['id'])
+                        bFileExists = ActualFileName is not None
+                        Metrics.Count('items_duplicate' if bFileExists else 'items_new', 1, CollectionId)
+                        if (not bFileExists):
+                            ActualFileName = MetaIndex.ItemName(CollectionId, dtItem.strftime("%Y%m%d"), gInterestBBOX['id'], CatSearchItem['id'])
+                        CatSearchItem['_filename'] = ActualFileName
+                        CatSearchItem['_overlap'] = round(ItemOverlap, 6)
+
+                        ### Save Reference Log to Array
+                        jLogData = {
+                            'LogUniqueId':CatSearchItem['_log_unique_id'],
+                            'ExecutionId':ExecutionId,
+                            'ExecutionDt':ExecutionDt,
+                            'CollectionId':CollectionId,
+                            'InterestBBOXId':gInterestBBOX['id'],
+                            'InterestBBOXName':gInterestBBOX['name'],
+                            'SearchRangeStartDt':dtUnitRangeStr.split('/')[0],
+                            'SearchRangeEndDt':dtUnitRangeStr.split('/')[1],
+                            'MetaFileUniqueId':CatSearchItem['_id'],
+                            'MetaFileDt':dtItem.isoformat(),
+                            'MetaFileName':CatSearchItem['_filename']
+                        }
+                        LogSink.Write(jLogData)
+
+                        ### Save File Locally
+                        if (not bFileExists):
+                            with Metrics.Timer('meta_write', CollectionId):
+                                MetaIndex.Save(CollectionId, dtItem.strftime("%Y%m%d"), CatSearchItem)
+                            for AssetRow in ItemAssetRows(CatSearchItem['_filename'], CollectionId, CatSearchItem):
+                                AssetSink.Write(dict(zip(AssetFieldNames, AssetRow)))
+                        with Metrics.Timer('catalog_add', CollectionId):
+                            Catalog.Add(CollectionId, CatSearchItem, gInterestBBOX['id'], gInterestBBOX['name'], CatSearchItem['_overlap'])
+                        HighWater.Update(CollectionId, gInterestBBOX['id'], v_dtItem=dtItem)
+                MetaIndex.Flush()
+                Catalog.Flush()
+        except (requests.exceptions.RequestException, pystac_client.exceptions.APIError) as e:
+            ### StacApiIO Wraps Transport Errors and Non-200 Responses in APIError
+            ### Rows of the Pages Already Handled Stay Logged, the Unit is Searched Again on Resume and Merged on log_unique_id
+            print(f"[ERRO] Falha ao buscar {CollectionId} para {SearchWindow['name']}: {e}")
+            Metrics.Count('stac_search_errors', 1, CollectionId)
+            bSweepFailed = True
+            continue
+
+        with Metrics.Timer('unit_flush', CollectionId):
+            LogSink.Flush()
+            AssetSink.Flush()
+            MetaIndex.Flush()
+        Checkpoint.MarkDone(CollectionId, [Member['id'] for Member in SearchWindow['members']], dtUnitRangeStr)
+        for Member in SearchWindow['members']:
+            HighWater.Update(CollectionId, Member['id'], v_dtSearchedUntil=datetime.datetime.fromisoformat(dtUnitRangeStr.split('/')[1]))
+
+    if (LogSink is not None):
+        LogSink.Close()
+        AssetSink.Close()
+    Checkpoint.Close(not bSweepFailed)
+    MetaIndex.Close()
+    Catalog.Close()
+    HighWater.Close(not bSweepFailed) # Only Persisted When the Sweep Finished, so a Resumed Sweep Rebuilds the Same Units as the Checkpoint
+    if (StacCache is not None):
+        print(f"[INFO] Cache STAC: {StacCache.Hits} acertos, {StacCache.Misses} falhas")
+    return not bSweepFailed
+
+
+def HarvestWorkerSetup(v_jWorkerEnv):
+    ### Runs Once in Each Spawned Worker, Which Opens Its Own STAC Session and State Connections
+    global ExecutionId, ExecutionDt, MetaPath, LogPath, CachePath, jSources, Harvest, Metrics
+
+    ExecutionId = v_jWorkerEnv['ExecutionId']
+    ExecutionDt = v_jWorkerEnv['ExecutionDt']
+    MetaPath = v_jWorkerEnv['MetaPath']
+    LogPath = v_jWorkerEnv['LogPath']
+    CachePath = v_jWorkerEnv['CachePath']
+    jSources = v_jWorkerEnv['jSources']
+    Harvest = dict(v_jWorkerEnv['Harvest'])
+    Harvest['RATE_LIMIT'] = Harvest['RATE_LIMIT'] / Harvest['PROCESSES'] # The Host Limit is Split Across the Workers
+    Metrics = PipelineMetrics()
+
+
+def HarvestShard(v_Source, v_ShardId, v_CollectionIds, v_ShardInterestBBOX, v_dtLoopStart, v_dtLoopEnd):
+    ### Returns (Sweep Finished, Metrics of This Job)
+    global ExecutionId, ExecutionDt, gCitiesInterestBBOX, Metrics
+
+    for gInterestBBOX in v_ShardInterestBBOX:
+        if (gInterestBBOX.get('geometry') is not None):
+            shapely.prepare(gInterestBBOX['geometry']) # Prepared State is Lost When Pickled
+    gCitiesInterestBBOX = v_ShardInterestBBOX
+    ShardExecutionId, ShardExecutionDt = ExecutionId, ExecutionDt
+    try:
+        return GetPlanetaryComputer(v_Source, v_dtLoopStart, v_dtLoopEnd, False, v_ShardId, v_CollectionIds), Metrics.Snapshot(True)
+    finally:
+        ExecutionId, ExecutionDt = ShardExecutionId, ShardExecutionDt
 
-        LogUniqFiles = []
-        LogUniqItems = []
-        LogFileName = LogPath+SourceData['SysName']+'_'+str(CollectionId)+'_'+str(ExecutionId)+'.csv'
-        if os.path.isfile(LogFileName):
-            with open(LogFileName, 'r') as fCsvLogFile:
-                LogFile = fCsvLogFile.read()
 
-            CsvHEader = LogFile.split('\n')[0].split(FieldDelim)
-            for CsvLine in LogFile.split('\n')[1:]:
-                if (len(CsvLine) == 0):
-                    continue
-                CsvItems = CsvLine.split(FieldDelim)
-                LogUniqItems.append(CsvItems[0])
-                LogUniqFiles.append(CsvItems[10])
-                PgSQL_Insert_Log = ("""
-                    INSERT INTO sat_images.metafiles_log (
-                        log_unique_id,
-                        execution_id,
-                        execution_dt,
-                        collection_id,
-                        interest_bbox_id,
-                        interest_bbox_name,
-                        search_range_start_dt,
-                        search_range_end_dt,
-                        meta_file_id,
-                        meta_file_dt,
-                        meta_file_name
-                    ) VALUES (
-                        '{log_unique_id}',
-                        '{execution_id}',
-                        to_timestamp('{execution_dt}','dd-mm-yyyy hh24:mi:ss'),
-                        '{collection_id}',
-                        {interest_bbox_id},
-                        '{interest_bbox_name}',
-                        to_timestamp('{search_range_start_dt}','dd-mm-yyyy hh24:mi:ss'),
-                        to_timestamp('{search_range_end_dt}','dd-mm-yyyy hh24:mi:ss'),
-                        '{meta_file_id}',
-                        to_timestamp('{meta_file_dt}','dd-mm-yyyy hh24:mi:ss'),
-                        '{meta_file_name}'
-                    );
-                    """.format(
-                        log_unique_id = CsvItems[0],
-                        execution_id = CsvItems[1],
-                        execution_dt = datetime.datetime.fromisoformat(CsvItems[2]).strftime("%d-%m-%Y %H:%M:%S"),
-                        collection_id = CsvItems[3],
-                        interest_bbox_id = CsvItems[4],
-                        interest_bbox_name = CsvItems[5].replace("'","''"),
-                        search_range_start_dt = datetime.datetime.fromisoformat(CsvItems[6]).strftime("%d-%m-%Y %H:%M:%S"),
-                        search_range_end_dt = datetime.datetime.fromisoformat(CsvItems[7]).strftime("%d-%m-%Y %H:%M:%S"),
-                        meta_file_id = CsvItems[8],
-                        meta_file_dt = datetime.datetime.fromisoformat(CsvItems[9]).strftime("%d-%m-%Y %H:%M:%S"),
-                        meta_file_name = CsvItems[10]
-                    ))
+def GetPlanetaryComputerSharded(v_Source=None, v_dtLoopStart=None, v_dtLoopEnd=None, v_bUpdateCatallog=False):
+    ### One Job per (State, Collection) on a Pool of Worker Processes, Windows Never Cross States so Shards Do Not Overlap
+    ### Shard Logs are Merged by ProcessPlanetaryComputer, Idempotent on log_unique_id
+    global ExecutionId, ExecutionDt, MetaPath, LogPath, CachePath, jSources, gCitiesInterestBBOX, Harvest, Metrics
+
+    SourceData = jSources[v_Source]
+    dtRangeStr = v_dtLoopStart.astimezone().isoformat()+'/'+v_dtLoopEnd.astimezone().isoformat()
 
+    if (v_bUpdateCatallog):
+        UpdatePlanetaryComputerCollections(v_Source, OpenStacCatalog())
+    CollectionIds = [collection['CollectionId'] for collection in EnabledCollections(v_Source)]
+
+    ### All Shards Log Under One Execution, Adopted From an Interrupted Sharded Sweep
+    Checkpoint = SweepCheckpoint(
+        os.path.realpath(LogPath+SourceData['SysName']+'_'+str(hashlib.md5(dtRangeStr.encode('UTF-8')).hexdigest())+'.checkpoint'),
+        ExecutionId, ExecutionDt)
+    ExecutionId = Checkpoint.ExecutionId
+    ExecutionDt = Checkpoint.ExecutionDt
+
+    ### Index and Catalog are Built Here, Not Concurrently by Every Worker
+    MetaIndex = OpenMetaStore(Harvest['META_STORE'], MetaPath)
+    OpenItemCatalog(MetaPath, MetaIndex).Close()
+    MetaIndex.Close()
+
+    ShardInterestBBOX = {}
+    for gInterestBBOX in gCitiesInterestBBOX:
+        if ((len(Harvest['STATES']) == 0) or (gInterestBBOX['state'] in Harvest['STATES'])):
+            ShardInterestBBOX.setdefault(gInterestBBOX['state'], []).append(gInterestBBOX)
+    ShardIds = sorted(ShardInterestBBOX, key=lambda ShardId: (-len(ShardInterestBBOX[ShardId]), ShardId)) # Largest First
+    print(f"[INFO] Coleta em {Harvest['PROCESSES']} processos: {len(ShardIds)} estados, {len(CollectionIds)} colecoes")
+
+    jWorkerEnv = {
+        'ExecutionId':ExecutionId,
+        'ExecutionDt':ExecutionDt,
+        'MetaPath':MetaPath,
+        'LogPath':LogPath,
+        'CachePath':CachePath,
+        'jSources':jSources,
+        'Harvest':Harvest
+    }
+    bSweepFailed = False
+    with concurrent.futures.ProcessPoolExecutor(max_workers=Harvest['PROCESSES'], mp_context=multiprocessing.get_context('spawn'),
+        initializer=HarvestWorkerSetup, initargs=(jWorkerEnv,)) as HarvestPool:
+        ShardFutures = {}
+        for CollectionId in CollectionIds:
+            for ShardId in ShardIds:
+                ShardFutures[HarvestPool.submit(HarvestShard, v_Source, ShardId, [CollectionId], ShardInterestBBOX[ShardId], v_dtLoopStart, v_dtLoopEnd)] = (ShardId, CollectionId)
+        for ShardFuture in concurrent.futures.as_completed(ShardFutures):
+            ShardId, CollectionId = ShardFutures[ShardFuture]
+            try:
+                bShardFinished, jShardMetrics = ShardFuture.result()
+                Metrics.Merge(jShardMetrics)
+                if (not bShardFinished):
+                    bSweepFailed = True
+            except Exception as e:
+                print(f"[ERRO] Falha na coleta de {CollectionId} para {ShardId}: {e}")
+                bSweepFailed = True
+    Checkpoint.Close(not bSweepFailed)
+    return not bSweepFailed
+
+
+def HarvestPlanetaryComputer(v_Source=None, v_dtLoopStart=None, v_dtLoopEnd=None, v_bUpdateCatallog=False):
+    ### Sharded Harvest When Harvest_PROCESSES > 1 or Harvest_STATES Restricts the States, Single Process Otherwise
+    global Harvest
+
+    if ((Harvest['PROCESSES'] > 1) or (len(Harvest['STATES']) > 0)):
+        return GetPlanetaryComputerSharded(v_Source, v_dtLoopStart, v_dtLoopEnd, v_bUpdateCatallog)
+    return GetPlanetaryComputer(v_Source, v_dtLoopStart, v_dtLoopEnd, v_bUpdateCatallog)
+
+
+class PublishedAssets:
+    ### Assets Already Sent to RabbitMQ per (Collection, Item, Asset Name), Signed Hrefs Change Between Runs so They are Not the Key
+    def __init__(self, v_StateFileName):
+        self.Conn = ConnectStateDb(v_StateFileName)
+        self.Conn.execute("""
+            CREATE TABLE IF NOT EXISTS published_assets (
+                collection_id   TEXT NOT NULL,
+                item_id         TEXT NOT NULL,
+                asset_name      TEXT NOT NULL,
+                href_link       TEXT,
+                published_dt    TEXT,
+                PRIMARY KEY (collection_id, item_id, asset_name)
+            ) WITHOUT ROWID;
+            """)
+        self.Partitions = {}
+
+    def IsPublished(self, v_CollectionId, v_ItemId, v_AssetName):
+        if v_CollectionId not in self.Partitions:
+            self.Partitions[v_CollectionId] = set(self.Conn.execute(
+                "SELECT item_id, asset_name FROM published_assets WHERE collection_id=?;", (v_CollectionId,)))
+        return (v_ItemId, v_AssetName) in self.Partitions[v_CollectionId]
+
+    def MarkPublished(self, v_CollectionId, v_AssetRows):
+        dtPublished = datetime.datetime.now(datetime.UTC).astimezone().isoformat()
+        self.Conn.executemany(
+            "INSERT OR REPLACE INTO published_assets VALUES (?,?,?,?,?);",
+            [(v_CollectionId, ItemId, AssetName, HrefLink, dtPublished) for ItemId, AssetName, HrefLink in v_AssetRows])
+        self.Conn.commit()
+        self.Partitions.setdefault(v_CollectionId, set()).update((ItemId, AssetName) for ItemId, AssetName, HrefLink in v_AssetRows)
+
+    def Close(self):
+        self.Conn.close()
+
+
+def OnMessageReturned(v_Channel, v_Method, v_Properties, v_Body):
+    ### Basic.Return of a mandatory Publish No Queue Took, Read by PublishAssets After the Batch Commit
+    global MsgReturned
+    MsgReturned.append(json.loads(v_Body))
+
+
+def OpenPublishChannel(v_MsgConnection):
+    ### Transactional Channel: a Batch is Published Back to Back and Confirmed by One tx_commit Round Trip
+    ### (on a Blocking Confirm-Select Channel Every basic_publish Waits for Its Own Ack)
+    global RabiitMQ
+
+    PublishChannel = v_MsgConnection.channel()
+    PublishChannel.queue_declare(queue=RabiitMQ['QUEUE'], durable=True)
+    PublishChannel.tx_select()
+    PublishChannel.add_on_return_callback(OnMessageReturned)
+    return PublishChannel
+
+
+def PublishAssets(v_CollectionId, v_ArrFilesToDownload, v_PublishedStore, v_BatchSize=500, v_SignHref=None):
+    ### Publishes New Assets in Batches on a Transactional Channel, Recording a Batch Once Its Commit Returned
+    ### A Batch That Failed to Sign or Commit is Not Recorded and Stops the Collection, Its Assets are Sent Again Next Run
+    global Msg_Rabiit, MsgChannelPublish, MsgReturned, RabiitMQ, Metrics
+
+    ### Keyed on the STAC Item id, Segment References (<segment>#<offset>) Share One File Name per Day
+    ArrPending = []
+    for jDonFile in v_ArrFilesToDownload:
+        if not v_PublishedStore.IsPublished(v_CollectionId, jDonFile['ItemId'], jDonFile['AssetName']):
+            ArrPending.append((jDonFile['ItemId'], jDonFile))
+
+    Published = 0
+    Returned = 0
+    dtStart = time.monotonic()
+    for BatchStart in range(0, len(ArrPending), v_BatchSize):
+        ArrBatch = ArrPending[BatchStart:BatchStart+v_BatchSize]
+        with Metrics.Timer('publish_batch', v_CollectionId):
+            ### Signed Before the First Publish, a Token Endpoint Failure Leaves No Transaction Open
+            try:
+                ArrBodies = [json.dumps(jDonFile if (v_SignHref is None) else dict(jDonFile, HrefLink=v_SignHref(jDonFile['HrefLink']))) for ItemId, jDonFile in ArrBatch]
+            except requests.exceptions.RequestException as e:
+                print(f"[ERRO] RabbitMQ {v_CollectionId}: falha ao assinar lote de {len(ArrBatch)}: {e!r}")
+                Metrics.Count('sign_errors', len(ArrBatch), v_CollectionId)
+                break
+
+            MsgReturned.clear()
+            try:
+                for MsgBody in ArrBodies:
+                    MsgChannelPublish.basic_publish (
+                        exchange='',
+                        routing_key=RabiitMQ['QUEUE'],
+                        body=MsgBody,
+                        properties=pika.BasicProperties(delivery_mode=2),
+                        mandatory=True
+                    )
+                MsgChannelPublish.tx_commit()
+                Msg_Rabiit.process_data_events(time_limit=0) # Dispatches the Basic.Return Received Before Commit-Ok, Heartbeats and Flow Control
+            except pika.exceptions.AMQPError as e:
+                print(f"[ERRO] RabbitMQ {v_CollectionId}: lote de {len(ArrBatch)} nao confirmado: {e!r}")
+                Metrics.Count('publish_errors', len(ArrBatch), v_CollectionId)
                 try:
-                    PgSQL_CURS.execute(PgSQL_Insert_Log)
-                except psycopg2.Error as e:
-                    pass #print(f"[DB ERROR] {e}")
-
-            LogUniqFiles = set(LogUniqFiles)
-            LogUniqItems = set(LogUniqItems)
-            PgSQL_CONN.commit()
-
-        ### Verify If Log File is in DB
-        PgSQL_Select_Log = ("""
-            SELECT COUNT(*) FROM sat_images.metafiles_log WHERE
-            execution_id='{execution_id}' AND collection_id='{collection_id}';
-            """.format(
-                execution_id = ExecutionId,
-                collection_id = CollectionId
-            ))
-        PgSQL_CURS.execute(PgSQL_Select_Log)
-        PgSQL_ROWS = PgSQL_CURS.fetchall()
-        PgSQL_Result = int(PgSQL_ROWS[0][0])
-
-        if ((PgSQL_Result == len(LogUniqItems)) and os.path.isfile(LogFileName)):
-            os.remove(LogFileName)
-
-        ### Verify If Log File is in DB
-        PgSQL_Select_Files_From_Log = ("""
-            SELECT DISTINCT meta_file_name FROM sat_images.metafiles_log WHERE
-            execution_id='{execution_id}' AND collection_id='{collection_id}';
-            """.format(
-                execution_id = ExecutionId,
-                collection_id = CollectionId
-            ))
-        PgSQL_CURS.execute(PgSQL_Select_Files_From_Log)
-        PgSQL_ROWS = PgSQL_CURS.fetchall()
-        PgSQL_Result = [DbItem[0] for DbItem in PgSQL_ROWS]
-        PgSQL_Result.sort()
-
-        ArrFilesToDownload = []
-        for MetaFile in PgSQL_Result:
-            with open(os.path.realpath(MetaFile), 'r') as fJsonMetaFIle:
-                jMetaFile = json.load(fJsonMetaFIle)
-                for jAssets in jMetaFile['assets']:
-                    FileAssets = jMetaFile['assets'][jAssets]
-                    if ('image' in FileAssets['type']):
-                        ArrFilesToDownload.append({
-                            'ExecutionId':ExecutionId,
-                            'MetaFile':MetaFile,
-                            'AssetName':jAssets,
-                            'AssetTitle':FileAssets['title'],
-                            'AssetType':FileAssets['type'],
-                            'HrefLink':FileAssets['href']
-                        })
+                    MsgChannelPublish.tx_rollback() # Channel May Still be Open, Drops What Was Published of the Batch
+                except pika.exceptions.AMQPError:
+                    pass
+                break
+
+            ### Unroutable Messages Were Not Queued, Left Unrecorded so the Next Run Retries Them
+            ReturnedKeys = set((jReturned['ItemId'], jReturned['AssetName']) for jReturned in MsgReturned)
+            ArrAcked = [(ItemId, jDonFile) for ItemId, jDonFile in ArrBatch if (ItemId, jDonFile['AssetName']) not in ReturnedKeys]
+            v_PublishedStore.MarkPublished(v_CollectionId, [(ItemId, jDonFile['AssetName'], jDonFile['HrefLink']) for ItemId, jDonFile in ArrAcked])
+            Published += len(ArrAcked)
+            Returned += len(ArrBatch) - len(ArrAcked)
+    dtElapsed = time.monotonic() - dtStart
+
+    Skipped = len(v_ArrFilesToDownload) - len(ArrPending)
+    Metrics.Count('assets_published', Published, v_CollectionId)
+    Metrics.Count('assets_already_queued', Skipped, v_CollectionId)
+    Metrics.Count('assets_unroutable', Returned, v_CollectionId)
+    print(f"[INFO] RabbitMQ {v_CollectionId}: {Published} publicados, {Skipped} ja enfileirados, {Returned} nao roteados, {(Published/dtElapsed) if (dtElapsed > 0) else 0:.0f} msg/s")
+    return Published, Skipped
+
+
+def ItemAssetRows(v_MetaFileName, v_CollectionId, v_jMetaFile):
+    ### Rows of sat_images.metafiles_assets, in AssetFieldNames Order
+    for jAssets in sorted(v_jMetaFile.get('assets', {})):
+        FileAssets = v_jMetaFile['assets'][jAssets]
+        yield (v_MetaFileName, v_CollectionId, v_jMetaFile['id'], jAssets, FileAssets.get('type', ''), FileAssets.get('title', ''), FileAssets['href'])
+
+
+def BulkLoadMetafilesAssets(v_AssetRows):
+    ### COPY Asset Rows Into a Staging Table, Then Merge Skipping (meta_file_name, asset_name) Already Loaded
+    global PgSQL_CONN, PgSQL_CURS, Metrics
+
+    StageRows = 0
+    StageBuffer = io.StringIO()
+    StageWriter = csv.writer(StageBuffer)
+    for AssetRow in v_AssetRows:
+        StageWriter.writerow(AssetRow)
+        StageRows += 1
+    StageBuffer.seek(0)
+
+    Inserted = 0
+    try:
+        PgSQL_CURS.execute("""
+            CREATE TEMP TABLE metafiles_assets_stage (
+                meta_file_name  TEXT,
+                collection_id   TEXT,
+                item_id         TEXT,
+                asset_name      TEXT,
+                asset_type      TEXT,
+                asset_title     TEXT,
+                href_link       TEXT
+            ) ON COMMIT DROP;
+            """)
+        PgSQL_CURS.copy_expert("COPY metafiles_assets_stage FROM STDIN WITH (FORMAT csv);", StageBuffer)
+        PgSQL_CURS.execute("""
+            INSERT INTO sat_images.metafiles_assets (
+                meta_file_name, collection_id, item_id, asset_name, asset_type, asset_title, href_link
+            ) SELECT
+                meta_file_name, collection_id, item_id, asset_name, asset_type, asset_title, href_link
+            FROM metafiles_assets_stage
+            ON CONFLICT (meta_file_name, asset_name) DO NOTHING;
+            """)
+        Inserted = PgSQL_CURS.rowcount
+        PgSQL_CONN.commit()
+    except psycopg2.Error as e:
+        PgSQL_CONN.rollback()
+        print(f"[DB ERROR] metafiles_assets: {e}")
+        Metrics.Count('db_errors', 1, 'metafiles_assets')
+
+    return Inserted, StageRows-Inserted
+
+
+def LoadAssetsLog(v_AssetsFileName, v_FieldDelim=','):
+    global Metrics
+
+    Rejected = [0]
+    def AssetRows(v_CsvReader):
+        for CsvItems in v_CsvReader:
+            if (len(CsvItems) == 7):
+                yield CsvItems
+            elif (len(CsvItems) > 0):
+                Rejected[0] += 1 # Torn or Merged by an Interrupted Run
+
+    with open(v_AssetsFileName, 'r', newline='') as fCsvLogFile:
+        CsvReader = csv.reader(fCsvLogFile, delimiter=v_FieldDelim)
+        next(CsvReader, None) # Header
+        Inserted, Skipped = BulkLoadMetafilesAssets(AssetRows(CsvReader))
+    if (Rejected[0] > 0):
+        print(f"[ERRO] {v_AssetsFileName}: {Rejected[0]} registros invalidos ignorados")
+        Metrics.Count('db_rows_rejected', Rejected[0], 'metafiles_assets')
+    return Inserted, Skipped
+
+
+def BulkLoadMetafilesLog(v_LogFileName, v_FieldDelim=','):
+    ### COPY the CSV Log Into a Staging Table, Then Merge Skipping log_unique_id Already in sat_images.metafiles_log
+    global PgSQL_CONN, PgSQL_CURS, Metrics
+
+    LogUniqItems = set()
+    StageRows = 0
+    Rejected = 0
+    StageBuffer = io.StringIO()
+    StageWriter = csv.writer(StageBuffer)
+    with open(v_LogFileName, 'r', newline='') as fCsvLogFile:
+        CsvReader = csv.reader(fCsvLogFile, delimiter=v_FieldDelim)
+        next(CsvReader, None) # Header
+        for CsvItems in CsvReader:
+            if (len(CsvItems) == 0):
+                continue
+            if ((len(CsvItems) != 11) or (len(CsvItems[0]) != 32) or (len(CsvItems[8]) != 32)):
+                Rejected += 1 # Torn or Merged With the Next Row by an Interrupted Run
+                continue
+            try:
+                StageRow = [
+                    CsvItems[0],
+                    CsvItems[1],
+                    datetime.datetime.fromisoformat(CsvItems[2]).strftime("%d-%m-%Y %H:%M:%S"),
+                    CsvItems[3],
+                    int(CsvItems[4]),
+                    CsvItems[5],
+                    datetime.datetime.fromisoformat(CsvItems[6]).strftime("%d-%m-%Y %H:%M:%S"),
+                    datetime.datetime.fromisoformat(CsvItems[7]).strftime("%d-%m-%Y %H:%M:%S"),
+                    CsvItems[8],
+                    datetime.datetime.fromisoformat(CsvItems[9]).strftime("%d-%m-%Y %H:%M:%S"),
+                    CsvItems[10]
+                ]
+            except ValueError:
+                Rejected += 1
+                continue
+            LogUniqItems.add(CsvItems[0])
+            StageRows += 1
+            StageWriter.writerow(StageRow)
+    StageBuffer.seek(0)
+    if (Rejected > 0):
+        print(f"[ERRO] {v_LogFileName}: {Rejected} registros invalidos ignorados")
+        Metrics.Count('db_rows_rejected', Rejected, 'metafiles_log')
+
+    Inserted = 0
+    try:
+        PgSQL_CURS.execute("""
+            CREATE TEMP TABLE metafiles_log_stage (
+                log_unique_id           TEXT,
+                execution_id            TEXT,
+                execution_dt            TEXT,
+                collection_id           TEXT,
+                interest_bbox_id        INTEGER,
+                interest_bbox_name      TEXT,
+                search_range_start_dt   TEXT,
+                search_range_end_dt     TEXT,
+                meta_file_id            TEXT,
+                meta_file_dt            TEXT,
+                meta_file_name          TEXT
+            ) ON COMMIT DROP;
+            """)
+        PgSQL_CURS.copy_expert("COPY metafiles_log_stage FROM STDIN WITH (FORMAT csv);", StageBuffer)
+        PgSQL_CURS.execute("""
+            INSERT INTO sat_images.metafiles_log (
+                log_unique_id,
+                execution_id,
+                execution_dt,
+                collection_id,
+                interest_bbox_id,
+                interest_bbox_name,
+                search_range_start_dt,
+                search_range_end_dt,
+                meta_file_id,
+                meta_file_dt,
+                meta_file_name
+            ) SELECT
+                log_unique_id,
+                execution_id,
+                to_timestamp(execution_dt,'dd-mm-yyyy hh24:mi:ss'),
+                collection_id,
+                interest_bbox_id,
+                interest_bbox_name,
+                to_timestamp(search_range_start_dt,'dd-mm-yyyy hh24:mi:ss'),
+                to_timestamp(search_range_end_dt,'dd-mm-yyyy hh24:mi:ss'),
+                meta_file_id,
+                to_timestamp(meta_file_dt,'dd-mm-yyyy hh24:mi:ss'),
+                meta_file_name
+            FROM metafiles_log_stage
+            ON CONFLICT (log_unique_id) DO NOTHING;
+            """)
+        Inserted = PgSQL_CURS.rowcount
+        PgSQL_CONN.commit()
+    except psycopg2.Error as e:
+        PgSQL_CONN.rollback()
+        print(f"[DB ERROR] {v_LogFileName}: {e}")
+        Metrics.Count('db_errors', 1, 'metafiles_log')
+
+    return LogUniqItems, Inserted, StageRows-Inserted
+
+
+def CollectionLogFiles(v_SysName, v_CollectionId):
+    ### <SysName>_<CollectionId>_<ExecutionId>.csv and the Shard Logs <SysName>_<CollectionId>_<ExecutionId>.<ShardId>.csv
+    global ExecutionId, LogPath
+
+    LogFileName = os.path.realpath(LogPath+v_SysName+'_'+str(v_CollectionId)+'_'+str(ExecutionId)+'.csv')
+    LogFileNames = [LogFileName] if os.path.isfile(LogFileName) else []
+    for ShardLogFileName in sorted(glob.glob(glob.escape(LogFileName[:-4])+'.*.csv')):
+        if (not ShardLogFileName.endswith('.assets.csv')):
+            LogFileNames.append(ShardLogFileName)
+    return LogFileNames
+
 
-        ### Verify Existent Files Before RabbitMQ
+def ProcessPlanetaryComputer(v_Source=None):
+    global ExecutionId, LogPath, MetaPath, jSources, FieldDelim, PgSQL_CONN, PgSQL_CURS, MsgChannelPublish, RabiitMQ, Metrics
+
+    SourceData = jSources[v_Source]
 
-        for jDonFile in ArrFilesToDownload:
-            MsgChannelPublish.basic_publish (
-                exchange='',
-                routing_key=RabiitMQ['QUEUE'],
-                body=json.dumps(jDonFile),
-                properties=pika.BasicProperties(delivery_mode=2)
-            )
+    CollectionIds = [collection['CollectionId'] for collection in EnabledCollections(v_Source)]
+    LogUniqItems = {}
+    LogFileNames = {}
+    for CollectionId in CollectionIds:
+        LogUniqItems[CollectionId] = set()
+        LogFileNames[CollectionId] = CollectionLogFiles(SourceData['SysName'], CollectionId)
+        for LogFileName in LogFileNames[CollectionId]:
+            with Metrics.Timer('db_load_log', CollectionId):
+                LogFileItems, Inserted, Skipped = BulkLoadMetafilesLog(LogFileName, FieldDelim)
+            LogUniqItems[CollectionId].update(LogFileItems)
+            Metrics.Count('db_log_rows_inserted', Inserted, CollectionId)
+            print(f"[INFO] metafiles_log {CollectionId}: {Inserted} inseridos, {Skipped} ignorados")
+            if os.path.isfile(LogFileName[:-4]+'.assets.csv'):
+                with Metrics.Timer('db_load_assets', CollectionId):
+                    Inserted, Skipped = LoadAssetsLog(LogFileName[:-4]+'.assets.csv', FieldDelim)
+                Metrics.Count('db_asset_rows_inserted', Inserted, CollectionId)
+                print(f"[INFO] metafiles_assets {CollectionId}: {Inserted} inseridos, {Skipped} ignorados")
+
+    ### Verify If Log Files are in DB, One Grouped Count for the Execution
+    with Metrics.Timer('db_reconcile'):
+        PgSQL_CURS.execute("""
+            SELECT collection_id, COUNT(*) FROM sat_images.metafiles_log WHERE
+            execution_id=%s AND collection_id = ANY(%s) GROUP BY collection_id;
+            """, (ExecutionId, CollectionIds))
+        PgSQL_Result = {DbItem[0]:int(DbItem[1]) for DbItem in PgSQL_CURS.fetchall()}
+
+    for CollectionId in CollectionIds:
+        if (PgSQL_Result.get(CollectionId, 0) == len(LogUniqItems[CollectionId])):
+            for LogFileName in LogFileNames[CollectionId]:
+                os.remove(LogFileName)
+                if os.path.isfile(LogFileName[:-4]+'.assets.csv'):
+                    os.remove(LogFileName[:-4]+'.assets.csv')
+
+    ### Meta Files Harvested Before Assets Were Extracted, Read Once and Loaded
+    PgSQL_CURS.execute("""
+        SELECT DISTINCT l.collection_id, l.meta_file_name FROM sat_images.metafiles_log l
+        WHERE l.execution_id=%s AND l.collection_id = ANY(%s) AND NOT EXISTS (
+            SELECT 1 FROM sat_images.metafiles_assets a WHERE a.meta_file_name = l.meta_file_name);
+        """, (ExecutionId, CollectionIds))
+    MissingAssets = dict((DbItem[1], DbItem[0]) for DbItem in PgSQL_CURS.fetchall())
+    if (len(MissingAssets) > 0):
+        with Metrics.Timer('db_load_assets', 'legacy'):
+            Inserted, Skipped = BulkLoadMetafilesAssets(
+                AssetRow for MetaFile, jMetaFile in ReadMetaItems(sorted(MissingAssets))
+                for AssetRow in ItemAssetRows(MetaFile, MissingAssets[MetaFile], jMetaFile))
+        print(f"[INFO] metafiles_assets (legado): {Inserted} inseridos, {Skipped} ignorados")
+
+    ### Download Manifest, One Set-Based Query for the Execution
+    with Metrics.Timer('db_manifest'):
+        PgSQL_CURS.execute("""
+            SELECT l.collection_id, l.meta_file_name, a.item_id, a.asset_name, a.asset_title, a.asset_type, a.href_link
+            FROM (SELECT DISTINCT collection_id, meta_file_name FROM sat_images.metafiles_log
+                  WHERE execution_id=%s AND collection_id = ANY(%s)) l
+            JOIN sat_images.metafiles_assets a ON a.meta_file_name = l.meta_file_name
+            WHERE a.asset_type LIKE '%%image%%'
+            ORDER BY l.collection_id, l.meta_file_name, a.asset_name;
+            """, (ExecutionId, CollectionIds))
+        DbManifest = PgSQL_CURS.fetchall()
+    ArrFilesToDownload = {CollectionId:[] for CollectionId in CollectionIds}
+    for DbItem in DbManifest:
+        ArrFilesToDownload[DbItem[0]].append({
+            'ExecutionId':ExecutionId,
+            'MetaFile':DbItem[1],
+            'ItemId':DbItem[2],
+            'AssetName':DbItem[3],
+            'AssetTitle':DbItem[4],
+            'AssetType':DbItem[5],
+            'HrefLink':DbItem[6]
+        })
+
+    ### Verify Existent Files Before RabbitMQ
+    PublishedStore = PublishedAssets(os.path.realpath(MetaPath+'Harvest.state.sqlite'))
+    for CollectionId in CollectionIds:
+        PublishAssets(CollectionId, ArrFilesToDownload[CollectionId], PublishedStore, RabiitMQ['BATCH'], SignHref)
+    PublishedStore.Close()
+
+
+def WriteRunReport():
+    ### JSON Report Next to the Logs, Plus the Prometheus Textfile When Configured
+    global ExecutionId, ExecutionDt, LogPath, Harvest, Metrics
+
+    jReport = {'ExecutionId':ExecutionId, 'ExecutionDt':ExecutionDt}
+    jReport.update(Metrics.Report())
+    ReportFileName = os.path.realpath(LogPath+'Run_'+str(ExecutionId)+'.report.json')
+    with open(ReportFileName, 'w') as fReportFile:
+        fReportFile.write(json.dumps(jReport, indent=4))
+    print(f"[INFO] Relatorio de execucao: {ReportFileName}")
+    if ((Harvest is not None) and (len(Harvest['METRICS_PROM_FILE']) > 0)):
+        Metrics.WritePrometheus(Harvest['METRICS_PROM_FILE'])
 
 
 def MainProcess():
-    global ExecutionId, ExecutionDt, jSources, PgSQL_CURS
+    global ExecutionId, ExecutionDt, jSources, PgSQL_CURS, Harvest, Metrics
 
     ExecutionDt = datetime.datetime.now(datetime.UTC).astimezone().isoformat()
     ExecutionId = str(hashlib.md5((ExecutionDt).encode('UTF-8')).hexdigest())
+    Metrics = PipelineMetrics()
 
     dtLoopEnd   = datetime.datetime.now().replace(hour=23, minute=59, second=59, microsecond=0)
     dtLoopStart = (dtLoopEnd.replace(hour=0, minute=0, second=0, day=1, month=1) - datetime.timedelta(days=1)).replace(day=1, month=1) # Get First Day of past Year
@@ -457,18 +2038,77 @@ def MainProcess():
 
     for Source in jSources:
         if (jSources[Source]['SysName'] == 'PlanetaryComputer'):
-            # GetPlanetaryComputer(Source, dtLoopStart, dtLoopEnd, bUpdateCatallog)
+            # HarvestPlanetaryComputer(Source, dtLoopStart, dtLoopEnd, bUpdateCatallog)
             ProcessPlanetaryComputer(Source)
 
 
+def CatalogDate(v_DateStr, v_bEndOfDay=False):
+    ### YYYY-MM-DD or Full ISO, Local Time When No Offset is Given
+    dtCatalog = datetime.datetime.fromisoformat(v_DateStr)
+    if (v_bEndOfDay and (len(v_DateStr) == 10)):
+        dtCatalog = dtCatalog.replace(hour=23, minute=59, second=59)
+    return dtCatalog.astimezone()
+
+
+def CatalogProcess(v_Args):
+    global MetaPath
+
+    if not os.path.isfile(os.path.realpath(MetaPath+'Items.catalog.sqlite')):
+        print(f"[ERRO] Catalogo de itens nao encontrado em {os.path.realpath(MetaPath)}")
+        return 1
+    Catalog = OpenItemCatalog(MetaPath)
+    dtQuery = time.perf_counter()
+    CatalogItems = Catalog.Search(
+        v_InterestBBOX=v_Args.city,
+        v_BBOX=[float(Coord) for Coord in v_Args.bbox.split(',')] if v_Args.bbox else None,
+        v_dtStart=CatalogDate(v_Args.start) if v_Args.start else None,
+        v_dtEnd=CatalogDate(v_Args.end, True) if v_Args.end else None,
+        v_MaxCloudCover=v_Args.max_cloud,
+        v_CollectionIds=v_Args.collection,
+        v_Limit=v_Args.limit)
+    dtQuery = time.perf_counter()-dtQuery
+    Catalog.Close()
+
+    if v_Args.json:
+        print(json.dumps(CatalogItems, indent=4))
+        return 0
+    for jCatalogItem in CatalogItems:
+        CloudCover = '-' if (jCatalogItem['CloudCover'] is None) else str(jCatalogItem['CloudCover'])
+        print(f"{jCatalogItem['ItemDt']}  {jCatalogItem['CollectionId']}  {jCatalogItem['ItemId']}  nuvens {CloudCover}  {jCatalogItem['MetaFileName']}")
+    print(f"[INFO] {len(CatalogItems)} itens em {round(dtQuery*1000, 1)} ms")
+    return 0
+
+
 def main():
-    global PgSQL_CONN, PgSQL_CURS, Msg_Rabiit
+    global PgSQL_CONN, PgSQL_CURS, Msg_Rabiit, StacCatalog, StacCache, Metrics
+
+    ArgParser = argparse.ArgumentParser(description='Py Geo Images, Without a Command Runs the Harvest and Process Cycle')
+    SubParsers = ArgParser.add_subparsers(dest='command')
+    CatalogParser = SubParsers.add_parser('catalog', help='Query the Local Item Catalog, No STAC Request')
+    CatalogParser.add_argument('--city', default=None, help='Interest BBOX id or Name')
+    CatalogParser.add_argument('--bbox', default=None, help='minx,miny,maxx,maxy Intersecting the Item Footprint, as --bbox=-50,-20,-49,-19')
+    CatalogParser.add_argument('--start', default=None, help='YYYY-MM-DD or ISO Datetime')
+    CatalogParser.add_argument('--end', default=None, help='YYYY-MM-DD (Whole Day) or ISO Datetime')
+    CatalogParser.add_argument('--max-cloud', type=float, default=None, help='Max eo:cloud_cover (%%)')
+    CatalogParser.add_argument('--collection', action='append', default=None, help='Collection id, Repeatable')
+    CatalogParser.add_argument('--limit', type=int, default=None)
+    CatalogParser.add_argument('--json', action='store_true')
+    Args = ArgParser.parse_args()
+
+    if (Args.command == 'catalog'):
+        sys.exit(CatalogProcess(Args))
 
     try:
         MainProcess()
     except KeyboardInterrupt:
         print("Py Geo Images Interrupted!")
     finally:
+        if Metrics:
+            WriteRunReport() # Also for Interrupted Runs
+        if StacCatalog:
+            StacCatalog._stac_io.session.close()
+        if StacCache:
+            StacCache.Close()
         if Msg_Rabiit:
             Msg_Rabiit.close()
         if PgSQL_CURS:
@@ -496,4 +2136,17 @@ CREATE TABLE sat_images.metafiles_log (
     meta_file_dt            TIMESTAMPTZ,
     meta_file_name          VARCHAR(255)
 );
+
+DROP TABLE sat_images.metafiles_assets;
+CREATE TABLE sat_images.metafiles_assets (
+    meta_file_name          VARCHAR(255),
+    collection_id           VARCHAR(50),
+    item_id                 VARCHAR(255),
+    asset_name              VARCHAR(100),
+    asset_type              VARCHAR(255),
+    asset_title             VARCHAR(255),
+    href_link               TEXT,
+    PRIMARY KEY (meta_file_name, asset_name)
+);
+CREATE INDEX metafiles_log_execution_idx ON sat_images.metafiles_log (execution_id, collection_id);
 '''
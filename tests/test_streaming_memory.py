@@ -0,0 +1,56 @@
+### Harvest Heap Peak Must Not Grow With the Date Range: Sweeps the PyGeoBench Mock STAC Over Two Ranges Under tracemalloc
+import os
+import sys
+import json
+import time
+import socket
+import subprocess
+import multiprocessing
+
+import pytest
+
+ThisPath = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, ThisPath)
+import PyGeoBench
+
+PeakTolerance = 0.2 # Peaks of the Short and Long Range May Differ by 20%, Pages in Flight are the Same Once Searches Span Several Pages
+
+
+@pytest.fixture(scope='module')
+def MockStacUrl():
+    ### The Mock Runs in Another Process, so Its Allocations are Not Traced
+    with socket.socket() as FreeSocket:
+        FreeSocket.bind(('127.0.0.1', 0))
+        MockPort = FreeSocket.getsockname()[1]
+    MockProcess = multiprocessing.get_context('spawn').Process(target=PyGeoBench.ServeMockStac, args=(MockPort, 1.0, 4, 100, 0.0), daemon=True)
+    MockProcess.start()
+    for itWait in range(50):
+        try:
+            socket.create_connection(('127.0.0.1', MockPort), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    yield 'http://127.0.0.1:'+str(MockPort)
+    MockProcess.terminate()
+    MockProcess.join()
+
+
+def HarvestHeapPeak(v_StacUrl, v_Days, v_MetaStore):
+    ### One Worker and One Buffered Page, the Rest of the Heap is What the Sweep Holds
+    CaseRun = subprocess.run([sys.executable, os.path.join(ThisPath, 'PyGeoBench.py'), 'case',
+        '--cities', '8', '--collections', '1', '--stac-url', v_StacUrl, '--days', str(v_Days),
+        '--search-workers', '1', '--page-buffer', '1', '--meta-store', v_MetaStore, '--tracemalloc'],
+        capture_output=True, text=True)
+    for OutputLine in CaseRun.stdout.splitlines():
+        if OutputLine.startswith('PYGEOBENCH '):
+            jResult = json.loads(OutputLine[len('PYGEOBENCH '):])
+            assert jResult['Harvested']
+            return jResult['HarvestHeapPeakMiB']
+    pytest.fail(f"PyGeoBench case falhou:\n{CaseRun.stdout[-2000:]}{CaseRun.stderr[-2000:]}")
+
+
+@pytest.mark.parametrize('MetaStore', ['files', 'segments'])
+def test_heap_peak_independent_of_date_range(MockStacUrl, MetaStore):
+    ShortPeak = HarvestHeapPeak(MockStacUrl, 60, MetaStore)
+    LongPeak = HarvestHeapPeak(MockStacUrl, 240, MetaStore)
+    assert LongPeak <= ShortPeak*(1+PeakTolerance), f"heap {ShortPeak} MiB em 60 dias, {LongPeak} MiB em 240 dias"